@@ -1,12 +1,10 @@
 import streamlit as st
-import os
-import pypdf
 import json
 import pandas as pd
 from dotenv import load_dotenv
-from agent import JobSearchAgent
-from supabase import create_client, Client
-from groq import Groq
+from text_extraction import extract_upload_text
+from app_clients import get_secret, get_supabase, get_agent, get_groq
+from role_taxonomy import ROLE_CATEGORIES
 from fpdf import FPDF
 
 # --- 1. CONFIG & STYLING ---
@@ -392,16 +390,6 @@ st.markdown("""
 load_dotenv()
 
 # --- 2. HELPER FUNCTIONS ---
-def extract_text(file):
-    """Extracts text from uploaded PDF or TXT files"""
-    try:
-        if file is None: return ""
-        if file.type == "application/pdf":
-            reader = pypdf.PdfReader(file)
-            return "".join([p.extract_text() for p in reader.pages])
-        return file.read().decode("utf-8")
-    except: return ""
-
 def create_pdf(text):
     """Safe PDF Generator - Fixes White Screen Crash"""
     try:
@@ -428,33 +416,16 @@ def create_pdf(text):
         print(f"PDF Gen Error: {e}")
         return None
 
-def get_secret(key):
-    if key in os.environ: return os.environ[key]
-    try: return st.secrets[key]
-    except: return None
-
 # --- 3. INITIALIZATION ---
-@st.cache_resource
-def init_supabase():
-    url = get_secret("SUPABASE_URL")
-    key = get_secret("SUPABASE_KEY")
-    if not url or not key: return None
-    return create_client(url, key)
-
-try: supabase = init_supabase()
+# Supabase, the agent and Groq are process-wide (app_clients); sessions only hold references
+try: supabase = get_supabase()
 except: supabase = None
 
 if 'agent' not in st.session_state:
-    api = get_secret("GEMINI_API_KEY")
-    qh = get_secret("QDRANT_HOST")
-    qk = get_secret("QDRANT_API_KEY")
-    if api and qh: st.session_state.agent = JobSearchAgent(api, qh, qk)
-    else: st.session_state.agent = None
+    st.session_state.agent = get_agent()
 
 if 'groq' not in st.session_state:
-    groq_key = get_secret("GROQ_API_KEY")
-    if groq_key: st.session_state.groq = Groq(api_key=groq_key)
-    else: st.session_state.groq = None
+    st.session_state.groq = get_groq()
 
 # --- 4. AUTH & LOGIC ---
 if 'user' not in st.session_state: st.session_state.user = None
@@ -767,7 +738,7 @@ def page_skill_migration():
     uploaded_cv = st.file_uploader("Upload your CV (PDF/TXT)", type=["pdf", "txt"], key="skill_migration_cv")
     
     if uploaded_cv:
-        cv_text = extract_text(uploaded_cv)
+        cv_text = extract_upload_text(uploaded_cv)
         if cv_text and st.session_state.agent:
             if st.button("🚀 Analyze CV", type="primary"):
                 with st.spinner("Analyzing your CV..."):
@@ -1191,7 +1162,7 @@ def page_cover_letter():
         if not uploaded_file: return st.warning("Please upload your CV.")
 
         try:
-            user_cv_text = extract_text(uploaded_file)
+            user_cv_text = extract_upload_text(uploaded_file)
             if jd_text and user_cv_text:
                 with st.spinner("Writing..."):
                     prompt = f"""
@@ -1295,7 +1266,7 @@ def page_cv_compiler():
     # Extract CV text
     cv_text = ""
     if uploaded_file:
-        cv_text = extract_text(uploaded_file)
+        cv_text = extract_upload_text(uploaded_file)
         st.session_state['compiler_cv_text'] = cv_text
     elif 'compiler_cv_text' in st.session_state:
         cv_text = st.session_state['compiler_cv_text']
@@ -1723,26 +1694,31 @@ def main():
         with st.container():
             c1, c2 = st.columns([2,1])
             with c1:
-                role = st.selectbox("Target Role", ["All", "Data Science", "Sales", "Engineering"])
+                role = st.selectbox("Target Role", ["All"] + ROLE_CATEGORIES)
                 f = st.file_uploader("Upload CV for Strategy", type=["pdf", "txt"])
             with c2:
                 st.markdown("<br>", unsafe_allow_html=True)
-                if st.button("Generate Strategy", type="primary"):
-                    if f and st.session_state.agent:
-                        with st.spinner("Agent working..."):
-                            txt = extract_text(f)
-                            md, rep, src = st.session_state.agent.generate_strategy(txt, role)
-                            st.session_state.results = {"md": md, "rep": rep, "src": src}
-                            
-                            # Save to Supabase
-                            if supabase and st.session_state.user_id:
-                                try:
-                                    supabase.table("analyses").insert({
-                                        "user_id": st.session_state.user_id,
-                                        "report_json": rep
-                                    }).execute()
-                                except: pass
-                            st.rerun()
+                generate_clicked = st.button("Generate Strategy", type="primary")
+                refresh = st.checkbox("Refresh (ignore cached result)", value=False)
+
+        if generate_clicked and f and st.session_state.agent:
+            with st.spinner("Agent working..."):
+                txt = extract_upload_text(f)
+                stream = st.session_state.agent.stream_strategy(txt, role, refresh=refresh)
+            # Render the tables progressively as Gemini streams them
+            st.write_stream(stream)
+            md, rep, src = stream.text, stream.skill_report, stream.sources
+            st.session_state.results = {"md": md, "rep": rep, "src": src}
+            
+            # Save to Supabase
+            if supabase and st.session_state.user_id:
+                try:
+                    supabase.table("analyses").insert({
+                        "user_id": st.session_state.user_id,
+                        "report_json": rep
+                    }).execute()
+                except: pass
+            st.rerun()
 
         if "results" in st.session_state:
             res = st.session_state.results
@@ -1,74 +1,467 @@
 import os
-import requests
+import re
+import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
 from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from qdrant_client.models import Filter, FieldCondition, MatchValue, QueryRequest
+from embedding_cache import get_default_cache
+from http_transport import ResilientTransport
+from strategy_cache import get_default_strategy_cache, get_default_semantic_cache, strategy_cache_key, SEMANTIC_CACHE_ENABLED
+from local_index import LocalVectorIndex, LOCAL_INDEX_PATH
+from rag_config import (
+    SEARCH_PAYLOAD_FIELDS, make_snippet, quantization_search_params, QUANTIZATION_OVERSAMPLING, EMBEDDING_MODEL,
+    EMBEDDING_DIM, COLLECTION_NAME, GEMINI_API_BASE, MAX_EMBED_BATCH, embedding_request, embedding_cache_model
+)
+from context_selection import mmr_select, estimate_tokens, MMR_LAMBDA, MMR_OVERFETCH, MAX_PER_SOURCE, CONTEXT_TOKEN_BUDGET
+from prompt_budget import PromptBudget, PROMPT_TOKEN_BUDGET
+from opportunity_store import OpportunityParser, parse_opportunities, get_default_opportunity_store
+
+# Multi-vector CV querying: section size stays inside text-embedding-004's input window
+CV_SECTION_CHARS = 3000
+MAX_CV_SECTIONS = 8
+RRF_K = 60
+CV_HEADINGS = ("summary", "profile", "objective", "experience", "employment", "work history", "education",
+               "skills", "projects", "certifications", "achievements", "awards", "publications", "languages")
+# One agent is shared by every app session, so the Gemini call pool and HTTP pool are sized for concurrency
+GENERATION_WORKERS = 16
+# Seconds between Qdrant health checks on a shared agent; a failed check triggers a reconnect
+QDRANT_HEALTH_CHECK_INTERVAL = 60
+# Bump when the strategy prompts change so cached results from older prompts are not reused
+PROMPT_VERSION = "v3"
 
 class JobSearchAgent:
-    def __init__(self, gemini_api_key, qdrant_host, qdrant_api_key, collection_name="resume_knowledge_base"):
+    def __init__(self, gemini_api_key, qdrant_host, qdrant_api_key, collection_name=COLLECTION_NAME,
+                 embed_batch_size=MAX_EMBED_BATCH, request_timeout=60, embedding_cache=None,
+                 max_retries=3, hedge_after=None, strategy_cache=None, query_mode="single",
+                 local_index_path=LOCAL_INDEX_PATH, prefer_grpc=False,
+                 quantization_oversampling=QUANTIZATION_OVERSAMPLING, quantization_rescore=True,
+                 embedding_dim=EMBEDDING_DIM, use_mmr=True, mmr_lambda=MMR_LAMBDA, max_per_source=MAX_PER_SOURCE,
+                 context_token_budget=CONTEXT_TOKEN_BUDGET, prompt_token_budget=PROMPT_TOKEN_BUDGET,
+                 semantic_cache=None, use_semantic_cache=SEMANTIC_CACHE_ENABLED, opportunity_store=None, record_opportunities=True,
+                 health_check_interval=QDRANT_HEALTH_CHECK_INTERVAL):
         self.gemini_key = gemini_api_key
         self.qdrant_host = qdrant_host
         self.qdrant_key = qdrant_api_key
         self.collection_name = collection_name
+        # gRPC sends vectors as packed floats instead of JSON lists
+        self.prefer_grpc = prefer_grpc
+        self.embed_batch_size = max(1, min(embed_batch_size, MAX_EMBED_BATCH))
+        self.request_timeout = request_timeout
+        self.embedding_cache = embedding_cache or get_default_cache()
+        self.strategy_cache = strategy_cache or get_default_strategy_cache()
+        # Opt-in (SEMANTIC_CACHE_ENABLED): near-identical CVs (same role filter) reuse a cached strategy,
+        # including its match reasons and skill scores; see SemanticStrategyCache
+        self.semantic_cache = (semantic_cache or get_default_semantic_cache()) if use_semantic_cache else None
+        # Rows of the opportunity tables in each fresh strategy are kept in a local SQLite table
+        self.opportunity_store = (opportunity_store or get_default_opportunity_store()) if record_opportunities else None
+        # Ignored by Qdrant for unquantized collections, so always safe to send
+        self.search_params = quantization_search_params(quantization_oversampling, quantization_rescore)
+        # Over-fetch and pick a diverse, budgeted context by MMR instead of the raw top-k
+        self.use_mmr = use_mmr
+        self.mmr_lambda = mmr_lambda
+        self.max_per_source = max_per_source
+        self.context_token_budget = context_token_budget
+        # Caps context + CV per strategy prompt; context is trimmed before the CV
+        self.prompt_budget = PromptBudget(prompt_token_budget)
+        # "single" embeds the whole CV; "multi" embeds each section and fuses the results
+        self.query_mode = query_mode
         
         # --- UPDATE: USING THE STRONGEST STABLE MODEL ---
         # gemini-2.5-flash-preview-09-2025 is the industry standard for high-reasoning tasks.
         # It follows formatting instructions (tables) better than Flash.
         self.gen_model = "gemini-2.5-flash-preview-09-2025" 
-        self.embedding_model = "text-embedding-004"
+        self.embedding_model = EMBEDDING_MODEL
+        # Must match the dimensionality the collection was built with (checked in _init_qdrant)
+        self.embedding_dim = embedding_dim
+        self.embedding_cache_model = embedding_cache_model(self.embedding_model, embedding_dim)
         
-        self.qdrant_client = self._init_qdrant()
+        # Shared keep-alive pool with per-call deadlines, retries and a circuit breaker
+        self.http = ResilientTransport(timeout=request_timeout, max_retries=max_retries, hedge_after=hedge_after,
+                                       pool_maxsize=GENERATION_WORKERS)
+        # Shared pool for issuing independent Gemini calls side by side
+        self._executor = ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix="gemini")
+
+        # Qdrant connects on first use, so constructing a (shared) agent never blocks on the network
+        self.health_check_interval = health_check_interval
+        self._qdrant_client = None
+        self._qdrant_checked_at = None
+        self._qdrant_lock = threading.Lock()
+        # Fall back to an in-process index over a local snapshot when Qdrant is unreachable
+        self.local_index_path = local_index_path
+        self._local_index = None
+        self._local_index_loaded = False
+        self._local_index_lock = threading.Lock()
+
+    @property
+    def qdrant_client(self):
+        """Connected Qdrant client or None, safe to use from many threads.
+
+        Connects on first access, then re-checks the connection every health_check_interval
+        seconds (or right after a failed search) and reconnects when the check fails. While a
+        re-check runs, other threads keep using the current client instead of waiting.
+        """
+        if not self.qdrant_host: return None
+        checked_at = self._qdrant_checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.health_check_interval:
+            return self._qdrant_client
+        # Only the very first connect makes callers wait
+        if not self._qdrant_lock.acquire(blocking=checked_at is None):
+            return self._qdrant_client
+        try:
+            checked_at = self._qdrant_checked_at
+            if checked_at is not None and time.monotonic() - checked_at < self.health_check_interval:
+                return self._qdrant_client
+            if self._qdrant_client is None or not self._qdrant_healthy(self._qdrant_client):
+                if self._qdrant_client is not None:
+                    print("Agent Warning: Qdrant health check failed, reconnecting")
+                    try: self._qdrant_client.close()
+                    except Exception: pass
+                self._qdrant_client = self._init_qdrant()
+            self._qdrant_checked_at = time.monotonic()
+            return self._qdrant_client
+        finally:
+            self._qdrant_lock.release()
+
+    @qdrant_client.setter
+    def qdrant_client(self, client):
+        self._qdrant_client = client
+        self._qdrant_checked_at = time.monotonic()
+
+    def _qdrant_healthy(self, client):
+        try:
+            return client.collection_exists(self.collection_name)
+        except Exception:
+            return False
+
+    def _qdrant_suspect(self):
+        # Force a health check on the next access instead of waiting out the interval
+        if self._qdrant_checked_at is not None:
+            self._qdrant_checked_at = float("-inf")
+
+    @property
+    def local_index(self):
+        if not self._local_index_loaded:
+            with self._local_index_lock:
+                if not self._local_index_loaded:
+                    self._local_index = self._init_local_index(self.local_index_path)
+                    self._local_index_loaded = True
+        return self._local_index
+
+    @local_index.setter
+    def local_index(self, index):
+        self._local_index = index
+        self._local_index_loaded = True
+
+    def _init_local_index(self, path):
+        if not path or not os.path.exists(path): return None
+        try:
+            index = LocalVectorIndex.load(path)
+            print(f"Agent: using local index snapshot ({len(index)} points)")
+            return index
+        except Exception as e:
+            print(f"Agent Warning: local index load failed: {e}")
+            return None
 
     def _init_qdrant(self):
         try:
             client = QdrantClient(
                 url=self.qdrant_host, 
                 api_key=self.qdrant_key,
-                prefer_grpc=False
+                prefer_grpc=self.prefer_grpc
             )
             # Quick connection check
-            client.get_collection(self.collection_name)
+            info = client.get_collection(self.collection_name)
+            size = getattr(info.config.params.vectors, "size", None)
+            if size and size != self.embedding_dim:
+                print(f"Agent Warning: {self.collection_name} holds {size}-dim vectors but queries are "
+                      f"{self.embedding_dim}-dim; set EMBEDDING_DIM={size} or use collection {COLLECTION_NAME}.")
+                return None
             return client
         except Exception as e:
             print(f"Agent Warning: Qdrant connection failed: {e}")
             return None
 
     def get_embedding(self, text):
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.embedding_model}:embedContent?key={self.gemini_key}"
-        payload = {"model": f"models/{self.embedding_model}", "content": {"parts": [{"text": text}]}}
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts, batch_size=None):
+        """Embeds many texts with batchEmbedContents. Returns one vector (or None on failure) per input text."""
+        vectors = self.embedding_cache.get_many(self.embedding_cache_model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if not missing:
+            return vectors
+
+        batch_size = max(1, min(batch_size or self.embed_batch_size, MAX_EMBED_BATCH))
+        url = f"{GEMINI_API_BASE}/models/{self.embedding_model}:batchEmbedContents?key={self.gemini_key}"
+        for start in range(0, len(missing), batch_size):
+            idx = missing[start:start + batch_size]
+            batch = [texts[i] for i in idx]
+            payload = {"requests": [embedding_request(text, self.embedding_model, self.embedding_dim) for text in batch]}
+            try:
+                resp = self.http.post(url, json=payload, timeout=self.request_timeout)
+                resp.raise_for_status()
+                embeddings = [e.get('values') for e in resp.json()['embeddings']]
+            except Exception:
+                continue
+            for i, vector in zip(idx, embeddings):
+                vectors[i] = vector
+            self.embedding_cache.put_many(self.embedding_cache_model, batch, embeddings)
+        return vectors
+
+    def search_knowledge_base(self, query_vector, role_filter="All", k=5):
+        """Returns the context entries for one query: one string per selected hit (or a one-entry status)."""
+        if not self.qdrant_client and self.local_index is None: return ["Knowledge Base unavailable."]
         try:
-            resp = requests.post(url, json=payload)
-            resp.raise_for_status()
-            return resp.json()['embedding']['values']
+            hits = self._query_batch([(query_vector, role_filter)], self._fetch_limit(k))[0]
         except Exception:
-            return None
+            return ["Search failed."]
+        return self._format_hits(self._select_context(self._fill_missing_snippets(hits), query_vector, k))
 
-    def search_knowledge_base(self, query_vector, role_filter="All", k=5):
-        if not self.qdrant_client: return "Knowledge Base unavailable."
-        
-        search_filter = None
-        if role_filter != "All":
-            search_filter = Filter(must=[FieldCondition(key="role", match=MatchValue(value=role_filter))])
+    def search_knowledge_base_multi(self, query_vectors, role_filter="All", k=5, per_query_k=10):
+        """Runs all sub-queries in one batched request and merges them with reciprocal rank fusion."""
+        if not self.qdrant_client and self.local_index is None: return ["Knowledge Base unavailable."]
+        try:
+            results = self._query_batch([(vector, role_filter) for vector in query_vectors], per_query_k)
+        except Exception:
+            return ["Search failed."]
+        fused, centroid = self._fuse_sections(results, query_vectors, k)
+        return self._format_hits(self._select_context(self._fill_missing_snippets(fused), centroid, k))
 
+    def search_knowledge_base_batch(self, queries, k=5):
+        """Searches several (query_vector, role_filter) pairs in one round-trip; returns one entry list per pair."""
+        if not self.qdrant_client and self.local_index is None: return [["Knowledge Base unavailable."] for _ in queries]
         try:
-            results = self.qdrant_client.search(
+            results = self._query_batch(queries, self._fetch_limit(k))
+        except Exception:
+            return [["Search failed."] for _ in queries]
+        return [
+            self._format_hits(self._select_context(self._fill_missing_snippets(hits), vector, k))
+            for hits, (vector, _) in zip(results, queries)
+        ]
+
+    def _fetch_limit(self, k):
+        return k * MMR_OVERFETCH if self.use_mmr else k
+
+    def _select_context(self, hits, query_vector, k):
+        if not self.use_mmr: return hits[:k]
+        return mmr_select(
+            hits, query_vector, k, text_of=lambda hit: hit.payload.get('snippet'),
+            lambda_=self.mmr_lambda, max_per_source=self.max_per_source, token_budget=self.context_token_budget
+        )
+
+    def _fuse_sections(self, results, query_vectors, k):
+        fused = reciprocal_rank_fusion(results)[:self._fetch_limit(k)]
+        # MMR relevance is measured against the centroid of the section vectors
+        centroid = [sum(values) / len(query_vectors) for values in zip(*query_vectors)]
+        return fused, centroid
+
+    def _query_batch(self, queries, limit):
+        client = self.qdrant_client
+        if not client:
+            return [self._search_local(vector, role_filter, limit) for vector, role_filter in queries]
+
+        try:
+            responses = client.query_batch_points(
+                collection_name=self.collection_name, requests=self._query_requests(queries, limit)
+            )
+        except Exception as e:
+            self._qdrant_suspect()
+            # Serve from the local snapshot right away instead of waiting for the next health check
+            if self.local_index is None: raise
+            print(f"Qdrant query failed, using local snapshot: {e}")
+            return [self._search_local(vector, role_filter, limit) for vector, role_filter in queries]
+        return [response.points for response in responses]
+
+    def _query_requests(self, queries, limit):
+        return [
+            QueryRequest(query=vector, filter=self._role_filter(role_filter), params=self.search_params,
+                         limit=limit, with_payload=SEARCH_PAYLOAD_FIELDS, with_vector=self.use_mmr)
+            for vector, role_filter in queries
+        ]
+
+    def _search_local(self, query_vector, role_filter, k):
+        role = None if role_filter == "All" else role_filter
+        hits = self.local_index.search(query_vector, limit=k, role=role, with_vectors=self.use_mmr)
+        for hit in hits:
+            if "snippet" not in hit.payload:
+                hit.payload = {**hit.payload, "snippet": make_snippet(hit.payload.get("text", ""))}
+        return hits
+
+    def _role_filter(self, role_filter):
+        if role_filter == "All": return None
+        return Filter(must=[FieldCondition(key="role", match=MatchValue(value=role_filter))])
+
+    def _fill_missing_snippets(self, hits):
+        # Points ingested before the snippet field existed only have the full text
+        missing = [hit for hit in hits if "snippet" not in (hit.payload or {})]
+        client = self.qdrant_client
+        if not missing or not client: return hits
+        try:
+            records = client.retrieve(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
-                query_filter=search_filter,
-                limit=k,
-                with_payload=True
+                ids=[hit.id for hit in missing],
+                with_payload=["text"]
             )
-            docs = [f"[Role: {hit.payload.get('role', 'Unknown')}] {hit.payload.get('text', '')[:600]}" for hit in results]
-            return "\n".join(docs) if docs else "No relevant resumes found."
+            _apply_snippets(missing, records)
         except Exception:
-            return "Search failed."
+            pass
+        return hits
+
+    def _format_hits(self, hits):
+        # One entry per hit, so the prompt budget can drop whole hits (snippets contain newlines)
+        docs = [
+            f"[Role: {hit.payload.get('role', 'Unknown')}] {hit.payload.get('snippet') or make_snippet(hit.payload.get('text', ''))}"
+            for hit in hits
+        ]
+        return docs or ["No relevant resumes found."]
+
+    def generate_strategy(self, cv_text, role_filter="All", with_timings=False, refresh=False):
+        timings = {}
+        started = time.perf_counter()
+
+        # 0. Exact-match cache (skipped when the user asks for a refresh)
+        cache_key = self._strategy_cache_key(cv_text, role_filter)
+        cached = None if refresh else self.strategy_cache.get(cache_key)
+        # 0b. Semantic cache: a near-identical CV for the same role filter reuses that result.
+        # The CV embedding is kept for storing this result; single mode gets it from the embedding cache.
+        cv_vector = None
+        if not cached and self.semantic_cache is not None:
+            cv_vector = self.get_embedding(cv_text)
+            if not refresh:
+                cached, timings["semantic_similarity"] = self._semantic_lookup(cv_vector, role_filter)
+        if cached:
+            timings["cache_hit"] = True
+            timings["total_s"] = round(time.perf_counter() - started, 3)
+            if with_timings:
+                return cached["md"], cached["rep"], cached["src"], timings
+            return cached["md"], cached["rep"], cached["src"]
 
-    def generate_strategy(self, cv_text, role_filter="All"):
         # 1. Retrieve Context
+        context_entries = self._retrieve_context(cv_text, role_filter)
+        timings["retrieval_s"] = round(time.perf_counter() - started, 3)
+
+        # 2. Build the skill-report (JSON) and strategy (Markdown) prompts
+        known_urls = self._known_careers_urls(role_filter)
+        json_schema, json_prompt, md_prompt, budget = self._build_strategy_prompts(cv_text, context_entries, known_urls)
+        usage = {"skill_report": {}, "strategy": {}}
+
+        # 3. Both calls only depend on the retrieved context, so run them side by side
+        generation_started = time.perf_counter()
+        report_future = self._call_gemini_async(json_prompt, schema=json_schema, usage=usage["skill_report"])
+        strategy_future = self._call_gemini_async(md_prompt, use_search=True, usage=usage["strategy"])
+        skill_report, timings["skill_report_s"] = report_future.result()
+        (markdown_text, sources), timings["strategy_s"] = strategy_future.result()
+        timings["generation_s"] = round(time.perf_counter() - generation_started, 3)
+        timings["tokens"] = token_report(budget, {"skill_report": json_prompt, "strategy": md_prompt}, usage)
+        timings["total_s"] = round(time.perf_counter() - started, 3)
+        self._store_strategy(cache_key, markdown_text, skill_report, sources, role_filter, cv_vector)
+        self._record_opportunities(parse_opportunities(markdown_text), role_filter, known_urls, sources)
+
+        if with_timings:
+            return markdown_text, skill_report, sources, timings
+        return markdown_text, skill_report, sources
+
+    def stream_strategy(self, cv_text, role_filter="All", refresh=False):
+        """Streaming variant of generate_strategy.
+
+        Returns a StrategyStream: iterate it (e.g. with st.write_stream) to get markdown
+        deltas as Gemini produces them. The skill report is generated in the background
+        meanwhile; .text, .sources and .skill_report are complete once iteration ends.
+        """
+        cache_key = self._strategy_cache_key(cv_text, role_filter)
+        cached = None if refresh else self.strategy_cache.get(cache_key)
+        cv_vector = None
+        if not cached and self.semantic_cache is not None:
+            cv_vector = self.get_embedding(cv_text)
+            if not refresh:
+                cached, _ = self._semantic_lookup(cv_vector, role_filter)
+        if cached:
+            report_future = Future()
+            report_future.set_result((cached["rep"], 0.0))
+            return StrategyStream(iter([cached["md"]]), list(cached["src"]), report_future)
+
+        context_entries = self._retrieve_context(cv_text, role_filter)
+        known_urls = self._known_careers_urls(role_filter)
+        json_schema, json_prompt, md_prompt, budget = self._build_strategy_prompts(cv_text, context_entries, known_urls)
+        usage = {"skill_report": {}, "strategy": {}}
+        report_future = self._call_gemini_async(json_prompt, schema=json_schema, usage=usage["skill_report"])
+        sources = []
+        deltas = self._stream_gemini(md_prompt, use_search=True, sources=sources, usage=usage["strategy"])
+        def on_complete(stream):
+            self._store_strategy(cache_key, stream.text, stream.skill_report, stream.sources, role_filter, cv_vector)
+            self._record_opportunities(stream.opportunities, role_filter, known_urls, stream.sources)
+
+        stream = StrategyStream(deltas, sources, report_future, on_complete=on_complete, parser=OpportunityParser())
+        # Filled in as the calls complete; usage counts are final once iteration ends
+        stream.tokens = token_report(budget, {"skill_report": json_prompt, "strategy": md_prompt}, usage)
+        return stream
+
+    def _model_version(self):
+        return f"{self.gen_model}|{self.embedding_cache_model}|{PROMPT_VERSION}"
+
+    def _strategy_cache_key(self, cv_text, role_filter):
+        return strategy_cache_key(cv_text, role_filter, self._model_version())
+
+    def _semantic_lookup(self, cv_vector, role_filter):
+        """Returns (cached_result, similarity) from the semantic cache; cached_result is None on a miss."""
+        if self.semantic_cache is None or not cv_vector: return None, None
+        return self.semantic_cache.get(f"{self._model_version()}:{role_filter}", cv_vector)
+
+    def _store_strategy(self, cache_key, markdown_text, skill_report, sources, role_filter=None, cv_vector=None):
+        # Never cache failures, otherwise a transient outage would be replayed for hours
+        if not markdown_text or markdown_text.startswith("Error:") or "Error: " in markdown_text[-500:]:
+            return
+        if not skill_report or "error" in skill_report:
+            return
+        result = {"md": markdown_text, "rep": skill_report, "src": sources}
+        self.strategy_cache.set(cache_key, result)
+        if self.semantic_cache is not None and cv_vector:
+            self.semantic_cache.set(f"{self._model_version()}:{role_filter}", cv_vector, result)
+
+    def _retrieve_context(self, cv_text, role_filter):
+        if self.query_mode == "multi":
+            sections = split_cv_sections(cv_text)
+            query_vecs = [v for v in self.get_embeddings(sections) if v]
+            return self.search_knowledge_base_multi(query_vecs, role_filter) if query_vecs else ["No context."]
+
         query_vec = self.get_embedding(cv_text)
-        context_text = self.search_knowledge_base(query_vec, role_filter) if query_vec else "No context."
+        return self.search_knowledge_base(query_vec, role_filter) if query_vec else ["No context."]
+
+    def _known_careers_urls(self, role_filter):
+        """Careers pages found by earlier strategies, so generation can skip searching for them."""
+        if self.opportunity_store is None: return []
+        try:
+            return self.opportunity_store.known_careers_urls(role_filter)
+        except Exception as e:
+            print(f"Opportunity Store Warning: lookup failed ({e})")
+            return []
+
+    def _record_opportunities(self, rows, role_filter, known_urls, sources):
+        """Stores the opportunity rows of a fresh strategy; offered URLs it merely repeats are not counted again."""
+        if self.opportunity_store is None: return
+        self.opportunity_store.add_many(rows, role_filter, offered=known_urls,
+                                        grounded=[source["uri"] for source in sources or []])
+
+    def _build_strategy_prompts(self, cv_text, context_entries, known_urls=()):
+        """Returns (json_schema, json_prompt, md_prompt, budget_report) with context and CV fitted to the token budget.
 
-        # 2. Skill Report (JSON)
+        context_entries are the retrieved hits (see _format_hits); the budget drops whole entries.
+        known_urls ([(company, url)]) are offered to the strategy prompt as known careers pages.
+        """
+        cv_text, context_text, budget = self.prompt_budget.fit(cv_text, context_entries)
+
+        # Both prompts open with the identical context + CV block so provider-side prompt
+        # caching can reuse it across the two calls; only the task instructions differ.
+        shared_prefix = f"""CONTEXT (similar resumes from the knowledge base):
+{context_text}
+
+CANDIDATE CV:
+{cv_text}
+"""
+
+        # Skill Report (JSON)
         json_schema = {
             "type": "OBJECT",
             "properties": {
@@ -80,19 +473,17 @@ class JobSearchAgent:
             "required": ["predictive_score", "weakest_link_skill", "tech_score"]
         }
         
-        json_prompt = f"Analyze this CV against the context. Context: {context_text}. CV: {cv_text}"
-        skill_report = self._call_gemini(json_prompt, schema=json_schema)
+        json_prompt = shared_prefix + "\nTASK: Analyze this CV against the context and return the skill report."
 
-        # 3. Strategy (Markdown Tables - STRICT MODE)
-        md_prompt = f"""
+        known_block = ""
+        if known_urls:
+            known_block = "\n        KNOWN CAREERS PAGES (from earlier searches; for these companies use this URL instead of searching for it):\n"
+            known_block += "\n".join(f"        - {company}: {url}" for company, url in known_urls) + "\n"
+
+        # Strategy (Markdown Tables - STRICT MODE)
+        md_prompt = shared_prefix + """
         SYSTEM: You are a Professional Career Strategist. You output ONLY structured Markdown.
         
-        CONTEXT:
-        {context_text}
-        
-        CANDIDATE CV:
-        {cv_text}
-        
         TASK:
         1. Search Google for 20 LIVE domestic job openings matching this CV.
         2. Search Google for 20 LIVE international visa-sponsoring companies matching this CV.
@@ -104,7 +495,7 @@ class JobSearchAgent:
         - NEVER write placeholder text like "[Insert Link]" or "Link found via Search"
         - If you cannot find the exact job posting URL, provide the company's main careers page URL
         - Format links as clickable markdown: [Apply Here](https://actualurl.com/careers)
-
+        """ + known_block + """
         REQUIRED OUTPUT FORMAT:
 
         ### 🏠 Domestic Opportunities
@@ -123,14 +514,34 @@ class JobSearchAgent:
         * **Step 1:** [Actionable Step]
         * **Step 2:** [Actionable Step]
         """
-        markdown_text, sources = self._call_gemini(md_prompt, use_search=True)
-        
-        return markdown_text, skill_report, sources
+        return json_schema, json_prompt, md_prompt, budget
+
+    def _call_gemini_async(self, prompt, schema=None, use_search=False, usage=None):
+        """Submits _call_gemini to the agent's thread pool. The future resolves to (result, seconds)."""
+        def timed_call():
+            call_started = time.perf_counter()
+            result = self._call_gemini(prompt, schema=schema, use_search=use_search, usage=usage)
+            return result, round(time.perf_counter() - call_started, 3)
+        return self._executor.submit(timed_call)
 
-    def _call_gemini(self, prompt, schema=None, use_search=False):
+    def _call_gemini(self, prompt, schema=None, use_search=False, usage=None):
+        """`usage`, when given, is filled with the response's usageMetadata token counts."""
         # Using the standard v1beta endpoint with the corrected model name
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gen_model}:generateContent?key={self.gemini_key}"
-        
+        url = f"{GEMINI_API_BASE}/models/{self.gen_model}:generateContent?key={self.gemini_key}"
+        payload = self._generation_payload(prompt, schema, use_search)
+
+        try:
+            resp = self.http.post(url, json=payload, timeout=self.request_timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            if usage is not None: usage.update(data.get('usageMetadata', {}))
+            return self._parse_generation(data, schema, use_search)
+
+        except Exception as e:
+            # Return empty structure on failure to prevent app crash
+            return ({"error": str(e)} if schema else (f"Error: {e}", []))
+
+    def _generation_payload(self, prompt, schema=None, use_search=False):
         payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": {}}
         
         if schema:
@@ -139,33 +550,143 @@ class JobSearchAgent:
         
         if use_search:
             payload["tools"] = [{"google_search": {}}] 
+        return payload
 
-        try:
-            resp = requests.post(url, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            candidate = data.get('candidates', [{}])[0]
-            text = candidate.get('content', {}).get('parts', [{}])[0].get('text', "")
-            
-            sources = []
-            if use_search:
-                meta = candidate.get('groundingMetadata', {})
-                chunks = meta.get('groundingChunks', []) or meta.get('groundingAttributions', [])
-                for chunk in chunks:
-                    web = chunk.get('web', {})
-                    if web.get('uri'):
-                        sources.append({"title": web.get('title', 'Source'), "uri": web['uri']})
-
-            if schema:
-                clean_text = text.replace("```json", "").replace("```", "").strip()
-                try:
-                    return json.loads(clean_text)
-                except:
-                    return {}
-            
-            return text, sources
+    def _parse_generation(self, data, schema=None, use_search=False):
+        candidate = data.get('candidates', [{}])[0]
+        text = candidate.get('content', {}).get('parts', [{}])[0].get('text', "")
+        sources = _extract_sources(candidate) if use_search else []
+
+        if schema:
+            clean_text = text.replace("```json", "").replace("```", "").strip()
+            try:
+                return json.loads(clean_text)
+            except:
+                return {}
+        
+        return text, sources
+
+    def _stream_gemini(self, prompt, use_search=False, sources=None, usage=None):
+        """Yields text deltas from streamGenerateContent (SSE). Grounding sources are appended to `sources`."""
+        url = f"{GEMINI_API_BASE}/models/{self.gen_model}:streamGenerateContent?alt=sse&key={self.gemini_key}"
+        payload = self._generation_payload(prompt, use_search=use_search)
 
+        try:
+            with self.http.post(url, json=payload, timeout=self.request_timeout, stream=True) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"): continue
+                    try:
+                        data = json.loads(line[len("data:"):].strip())
+                    except ValueError:
+                        continue
+                    # Each chunk repeats the running totals, so the last one wins
+                    if usage is not None: usage.update(data.get('usageMetadata', {}))
+                    candidate = data.get('candidates', [{}])[0]
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'): yield part['text']
+                    if use_search and sources is not None:
+                        for source in _extract_sources(candidate):
+                            if source not in sources: sources.append(source)
         except Exception as e:
-            # Return empty structure on failure to prevent app crash
-            return ({"error": str(e)} if schema else (f"Error: {e}", []))
+            yield f"\n\nError: {e}"
+
+
+class StrategyStream:
+    """Iterable of markdown deltas from JobSearchAgent.stream_strategy."""
+
+    def __init__(self, deltas, sources, report_future, on_complete=None, parser=None):
+        self._deltas = deltas
+        self._report_future = report_future
+        self._on_complete = on_complete
+        self._parser = parser
+        self.sources = sources
+        self.text = ""
+        # Opportunity table rows parsed as the deltas arrive (empty for cached results)
+        self.opportunities = []
+        # Per-call token report (see token_report); None for cached results
+        self.tokens = None
+
+    def __iter__(self):
+        for delta in self._deltas:
+            self.text += delta
+            if self._parser: self.opportunities.extend(self._parser.feed(delta))
+            yield delta
+        if self._parser: self.opportunities.extend(self._parser.close())
+        if self._on_complete:
+            self._on_complete(self)
+
+    @property
+    def skill_report(self):
+        return self._report_future.result()[0]
+
+
+def token_report(budget, prompts, usage):
+    """Per-call token counts: our estimate of each prompt, the budget report, and Gemini's usageMetadata.
+
+    `usage` holds one dict per call that _call_gemini fills in (promptTokenCount, candidatesTokenCount
+    and, when the shared prefix was served from Gemini's implicit cache, cachedContentTokenCount).
+    """
+    report = {"budget": budget}
+    for name, prompt in prompts.items():
+        report[name] = {"estimated_prompt_tokens": estimate_tokens(prompt), "usage": usage[name]}
+    return report
+
+
+def split_cv_sections(cv_text, max_chars=CV_SECTION_CHARS, max_sections=MAX_CV_SECTIONS):
+    """Splits a CV at heading-like lines into at most max_sections chunks of up to max_chars each."""
+    text = (cv_text or "").strip()
+    if not text: return []
+    # Grow the chunk size for very long CVs instead of dropping their tail
+    max_chars = max(max_chars, -(-len(text) // max_sections))
+
+    sections, current = [], ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line: continue
+        words = re.sub(r"[^a-z ]", "", line.lower()).strip()
+        is_heading = len(line) < 40 and (line.isupper() or words in CV_HEADINGS)
+        if current and (is_heading or len(current) + len(line) + 1 > max_chars):
+            sections.append(current)
+            current = ""
+        while len(line) > max_chars:
+            sections.append(line[:max_chars])
+            line = line[max_chars:]
+        current = f"{current}\n{line}" if current else line
+    if current: sections.append(current)
+
+    # Fold tiny sections (a lone heading, a contact line) into their neighbour
+    merged = []
+    for section in sections:
+        if merged and len(merged[-1]) + len(section) + 1 <= max_chars and (len(section) < 200 or len(merged[-1]) < 200):
+            merged[-1] = f"{merged[-1]}\n{section}"
+        else:
+            merged.append(section)
+    return merged[:max_sections]
+
+
+def reciprocal_rank_fusion(result_lists, k=RRF_K):
+    """Fuses ranked hit lists: score(doc) = sum over lists of 1 / (k + rank)."""
+    scores, hits = {}, {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, start=1):
+            scores[hit.id] = scores.get(hit.id, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit.id, hit)
+    return [hits[point_id] for point_id in sorted(scores, key=scores.get, reverse=True)]
+
+
+def _apply_snippets(hits, records):
+    texts = {record.id: (record.payload or {}).get("text", "") for record in records}
+    for hit in hits:
+        hit.payload = {**(hit.payload or {}), "snippet": make_snippet(texts.get(hit.id, ""))}
+
+
+def _extract_sources(candidate):
+    sources = []
+    meta = candidate.get('groundingMetadata', {})
+    chunks = meta.get('groundingChunks', []) or meta.get('groundingAttributions', [])
+    for chunk in chunks:
+        web = chunk.get('web', {})
+        if web.get('uri'):
+            sources.append({"title": web.get('title', 'Source'), "uri": web['uri']})
+    return sources
@@ -0,0 +1,47 @@
+import os
+import streamlit as st
+from supabase import create_client
+from groq import Groq
+from agent import JobSearchAgent
+from strategy_cache import SupabaseStrategyCache
+
+# Process-wide clients shared by every Streamlit session and page. st.cache_resource builds
+# each one once per server process; the clients themselves are thread-safe (pooled HTTP,
+# JobSearchAgent connects to Qdrant lazily and health-checks / reconnects on its own).
+
+
+def get_secret(key):
+    if key in os.environ: return os.environ[key]
+    try: return st.secrets[key]
+    except: return None
+
+
+@st.cache_resource
+def get_supabase():
+    url = get_secret("SUPABASE_URL")
+    key = get_secret("SUPABASE_KEY")
+    if not url or not key: return None
+    return create_client(url, key)
+
+
+@st.cache_resource
+def get_agent():
+    api = get_secret("GEMINI_API_KEY")
+    qh = get_secret("QDRANT_HOST")
+    qk = get_secret("QDRANT_API_KEY")
+    if not api or not qh: return None
+    # Multi-replica deployments can share cached strategies through Supabase
+    strategy_cache = None
+    if get_secret("STRATEGY_CACHE_BACKEND") == "supabase":
+        try: supabase = get_supabase()
+        except Exception: supabase = None
+        if supabase: strategy_cache = SupabaseStrategyCache(supabase)
+    prefer_grpc = str(get_secret("QDRANT_PREFER_GRPC") or "").lower() in ("1", "true", "yes")
+    return JobSearchAgent(api, qh, qk, strategy_cache=strategy_cache, prefer_grpc=prefer_grpc)
+
+
+@st.cache_resource
+def get_groq():
+    key = get_secret("GROQ_API_KEY")
+    if key: return Groq(api_key=key)
+    return None
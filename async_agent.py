@@ -0,0 +1,290 @@
+import asyncio
+import time
+import httpx
+from qdrant_client import AsyncQdrantClient
+from agent import JobSearchAgent, GEMINI_API_BASE, MAX_EMBED_BATCH, split_cv_sections, token_report, _apply_snippets
+from http_transport import RETRY_STATUSES, CircuitOpenError
+from rag_config import embedding_request
+from opportunity_store import parse_opportunities
+
+# Default cap on concurrent generations in agenerate_strategies
+MAX_CONCURRENT_STRATEGIES = 50
+
+
+class AsyncJobSearchAgent(JobSearchAgent):
+    """asyncio counterpart of JobSearchAgent for headless services and batch jobs.
+
+    Uses AsyncQdrantClient and an httpx.AsyncClient, so one process can run hundreds of
+    strategy generations at once. Prompts, response parsing, context selection, caches and
+    the per-host circuit breakers are inherited from JobSearchAgent; only the I/O differs,
+    and the sync methods keep working on the same instance.
+
+        async with AsyncJobSearchAgent(key, host, qdrant_key) as agent:
+            md, report, sources = await agent.agenerate_strategy(cv_text)
+    """
+
+    def __init__(self, gemini_api_key, qdrant_host, qdrant_api_key, max_connections=100, **kwargs):
+        super().__init__(gemini_api_key, qdrant_host, qdrant_api_key, **kwargs)
+        self.ahttp = httpx.AsyncClient(
+            timeout=self.request_timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        # Connected on first use and health-checked like the sync client, without blocking the event loop
+        self._aqdrant_client = None
+        self._aqdrant_checked_at = None
+        self._aqdrant_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.ahttp.aclose()
+        if self._aqdrant_client: await self._aqdrant_client.close()
+
+    async def aqdrant(self):
+        """Connected AsyncQdrantClient or None.
+
+        Connects on first call, then re-checks every health_check_interval seconds (or right
+        after a failed search) and reconnects when the check fails.
+        """
+        if not self.qdrant_host: return None
+        checked_at = self._aqdrant_checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.health_check_interval:
+            return self._aqdrant_client
+        async with self._aqdrant_lock:
+            checked_at = self._aqdrant_checked_at
+            if checked_at is not None and time.monotonic() - checked_at < self.health_check_interval:
+                return self._aqdrant_client
+            client = self._aqdrant_client
+            if client is None or not await self._aqdrant_healthy(client):
+                if client is not None:
+                    print("Agent Warning: Qdrant health check failed, reconnecting")
+                    try: await client.close()
+                    except Exception: pass
+                self._aqdrant_client = await self._ainit_qdrant()
+            self._aqdrant_checked_at = time.monotonic()
+            return self._aqdrant_client
+
+    async def _aqdrant_healthy(self, client):
+        try:
+            return await client.collection_exists(self.collection_name)
+        except Exception:
+            return False
+
+    def _aqdrant_suspect(self):
+        if self._aqdrant_checked_at is not None:
+            self._aqdrant_checked_at = float("-inf")
+
+    async def _ainit_qdrant(self):
+        client = AsyncQdrantClient(url=self.qdrant_host, api_key=self.qdrant_key, prefer_grpc=self.prefer_grpc)
+        try:
+            info = await client.get_collection(self.collection_name)
+            size = getattr(info.config.params.vectors, "size", None)
+            if size and size != self.embedding_dim:
+                print(f"Agent Warning: {self.collection_name} holds {size}-dim vectors but queries are "
+                      f"{self.embedding_dim}-dim; set EMBEDDING_DIM={size}.")
+                await client.close()
+                return None
+            return client
+        except Exception as e:
+            print(f"Agent Warning: Qdrant connection failed: {e}")
+            try: await client.close()
+            except Exception: pass
+            return None
+
+    async def _apost(self, url, payload):
+        """POST with the same deadline, retry and circuit-breaker policy as the sync transport."""
+        transport = self.http
+        breaker = transport.breaker(url)
+        deadline = time.monotonic() + self.request_timeout
+        last_error = None
+
+        for attempt in range(transport.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {httpx.URL(url).host}")
+            try:
+                resp = await self.ahttp.post(url, json=payload, timeout=remaining)
+            except httpx.HTTPError as e:
+                breaker.record_failure()
+                last_error = e
+                await asyncio.sleep(min(transport.backoff(attempt), max(0, deadline - time.monotonic())))
+                continue
+
+            if resp.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+                wait_s = transport.backoff(attempt, resp.headers.get("Retry-After"))
+                if attempt < transport.max_retries and time.monotonic() + wait_s < deadline:
+                    await asyncio.sleep(wait_s)
+                    continue
+            else:
+                breaker.record_success()
+            resp.raise_for_status()
+            return resp.json()
+
+        raise last_error or httpx.TimeoutException(f"Deadline exceeded for {httpx.URL(url).host}")
+
+    # --- Embeddings ---
+    async def aget_embedding(self, text):
+        return (await self.aget_embeddings([text]))[0]
+
+    async def aget_embeddings(self, texts, batch_size=None):
+        """Async get_embeddings: cache first, then concurrent batchEmbedContents calls for the misses."""
+        vectors = self.embedding_cache.get_many(self.embedding_cache_model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if not missing:
+            return vectors
+
+        batch_size = max(1, min(batch_size or self.embed_batch_size, MAX_EMBED_BATCH))
+        url = f"{GEMINI_API_BASE}/models/{self.embedding_model}:batchEmbedContents?key={self.gemini_key}"
+
+        async def embed_batch(idx):
+            batch = [texts[i] for i in idx]
+            payload = {"requests": [embedding_request(text, self.embedding_model, self.embedding_dim) for text in batch]}
+            try:
+                data = await self._apost(url, payload)
+                embeddings = [e.get('values') for e in data['embeddings']]
+            except Exception:
+                return
+            for i, vector in zip(idx, embeddings):
+                vectors[i] = vector
+            self.embedding_cache.put_many(self.embedding_cache_model, batch, embeddings)
+
+        await asyncio.gather(*(embed_batch(missing[s:s + batch_size]) for s in range(0, len(missing), batch_size)))
+        return vectors
+
+    # --- Retrieval ---
+    async def asearch_knowledge_base(self, query_vector, role_filter="All", k=5):
+        if not await self.aqdrant() and self.local_index is None: return ["Knowledge Base unavailable."]
+        try:
+            hits = (await self._aquery_batch([(query_vector, role_filter)], self._fetch_limit(k)))[0]
+        except Exception:
+            return ["Search failed."]
+        hits = await self._afill_missing_snippets(hits)
+        return self._format_hits(self._select_context(hits, query_vector, k))
+
+    async def asearch_knowledge_base_multi(self, query_vectors, role_filter="All", k=5, per_query_k=10):
+        if not await self.aqdrant() and self.local_index is None: return ["Knowledge Base unavailable."]
+        try:
+            results = await self._aquery_batch([(vector, role_filter) for vector in query_vectors], per_query_k)
+        except Exception:
+            return ["Search failed."]
+        fused, centroid = self._fuse_sections(results, query_vectors, k)
+        fused = await self._afill_missing_snippets(fused)
+        return self._format_hits(self._select_context(fused, centroid, k))
+
+    async def asearch_knowledge_base_batch(self, queries, k=5):
+        if not await self.aqdrant() and self.local_index is None: return [["Knowledge Base unavailable."] for _ in queries]
+        try:
+            results = await self._aquery_batch(queries, self._fetch_limit(k))
+        except Exception:
+            return [["Search failed."] for _ in queries]
+        contexts = []
+        for hits, (vector, _) in zip(results, queries):
+            hits = await self._afill_missing_snippets(hits)
+            contexts.append(self._format_hits(self._select_context(hits, vector, k)))
+        return contexts
+
+    async def _aquery_batch(self, queries, limit):
+        client = await self.aqdrant()
+        if not client:
+            return [self._search_local(vector, role_filter, limit) for vector, role_filter in queries]
+        try:
+            responses = await client.query_batch_points(
+                collection_name=self.collection_name, requests=self._query_requests(queries, limit)
+            )
+        except Exception as e:
+            self._aqdrant_suspect()
+            if self.local_index is None: raise
+            print(f"Qdrant query failed, using local snapshot: {e}")
+            return [self._search_local(vector, role_filter, limit) for vector, role_filter in queries]
+        return [response.points for response in responses]
+
+    async def _afill_missing_snippets(self, hits):
+        missing = [hit for hit in hits if "snippet" not in (hit.payload or {})]
+        if not missing: return hits
+        client = await self.aqdrant()
+        if not client: return hits
+        try:
+            records = await client.retrieve(
+                collection_name=self.collection_name, ids=[hit.id for hit in missing], with_payload=["text"]
+            )
+            _apply_snippets(missing, records)
+        except Exception:
+            pass
+        return hits
+
+    async def _aretrieve_context(self, cv_text, role_filter):
+        if self.query_mode == "multi":
+            sections = split_cv_sections(cv_text)
+            query_vecs = [v for v in await self.aget_embeddings(sections) if v]
+            return await self.asearch_knowledge_base_multi(query_vecs, role_filter) if query_vecs else ["No context."]
+
+        query_vec = await self.aget_embedding(cv_text)
+        return await self.asearch_knowledge_base(query_vec, role_filter) if query_vec else ["No context."]
+
+    # --- Generation ---
+    async def _acall_gemini(self, prompt, schema=None, use_search=False, usage=None):
+        """Async _call_gemini. Returns (result, seconds) like the futures from _call_gemini_async."""
+        started = time.perf_counter()
+        url = f"{GEMINI_API_BASE}/models/{self.gen_model}:generateContent?key={self.gemini_key}"
+        try:
+            data = await self._apost(url, self._generation_payload(prompt, schema, use_search))
+            if usage is not None: usage.update(data.get('usageMetadata', {}))
+            result = self._parse_generation(data, schema, use_search)
+        except Exception as e:
+            result = {"error": str(e)} if schema else (f"Error: {e}", [])
+        return result, round(time.perf_counter() - started, 3)
+
+    async def agenerate_strategy(self, cv_text, role_filter="All", with_timings=False, refresh=False):
+        """Async generate_strategy with the same return shape and caching."""
+        timings = {}
+        started = time.perf_counter()
+
+        cache_key = self._strategy_cache_key(cv_text, role_filter)
+        cached = None if refresh else self.strategy_cache.get(cache_key)
+        cv_vector = None
+        if not cached and self.semantic_cache is not None:
+            cv_vector = await self.aget_embedding(cv_text)
+            if not refresh:
+                cached, timings["semantic_similarity"] = self._semantic_lookup(cv_vector, role_filter)
+        if cached:
+            timings["cache_hit"] = True
+            timings["total_s"] = round(time.perf_counter() - started, 3)
+            result = (cached["md"], cached["rep"], cached["src"])
+            return (*result, timings) if with_timings else result
+
+        context_entries = await self._aretrieve_context(cv_text, role_filter)
+        timings["retrieval_s"] = round(time.perf_counter() - started, 3)
+
+        known_urls = self._known_careers_urls(role_filter)
+        json_schema, json_prompt, md_prompt, budget = self._build_strategy_prompts(cv_text, context_entries, known_urls)
+        usage = {"skill_report": {}, "strategy": {}}
+        generation_started = time.perf_counter()
+        (skill_report, timings["skill_report_s"]), ((markdown_text, sources), timings["strategy_s"]) = await asyncio.gather(
+            self._acall_gemini(json_prompt, schema=json_schema, usage=usage["skill_report"]),
+            self._acall_gemini(md_prompt, use_search=True, usage=usage["strategy"])
+        )
+        timings["generation_s"] = round(time.perf_counter() - generation_started, 3)
+        timings["tokens"] = token_report(budget, {"skill_report": json_prompt, "strategy": md_prompt}, usage)
+        timings["total_s"] = round(time.perf_counter() - started, 3)
+        self._store_strategy(cache_key, markdown_text, skill_report, sources, role_filter, cv_vector)
+        self._record_opportunities(parse_opportunities(markdown_text), role_filter, known_urls, sources)
+
+        result = (markdown_text, skill_report, sources)
+        return (*result, timings) if with_timings else result
+
+    async def agenerate_strategies(self, requests_, max_concurrency=MAX_CONCURRENT_STRATEGIES, **kwargs):
+        """Runs agenerate_strategy for many (cv_text, role_filter) pairs, at most max_concurrency at a time."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(cv_text, role_filter):
+            async with semaphore:
+                return await self.agenerate_strategy(cv_text, role_filter, **kwargs)
+
+        return await asyncio.gather(*(run(cv_text, role_filter) for cv_text, role_filter in requests_))
@@ -0,0 +1,57 @@
+import os
+from embedding_cache import get_default_cache
+from http_transport import ResilientTransport
+from rag_config import (
+    GEMINI_API_BASE, MAX_EMBED_BATCH, EMBEDDING_MODEL, EMBEDDING_DIM, embedding_request, embedding_cache_model
+)
+
+# --- Ingestion Embedding Config ---
+# Whole-call deadline for one batchEmbedContents request, retries included
+EMBED_REQUEST_TIMEOUT = float(os.environ.get("EMBED_REQUEST_TIMEOUT", "60"))
+EMBED_MAX_RETRIES = int(os.environ.get("EMBED_MAX_RETRIES", "4"))
+
+
+class BatchEmbedder:
+    """Embeds lists of texts with batchEmbedContents for the ingestion scripts.
+
+    Calls go through one ResilientTransport (keep-alive pool, deadline, retries honouring
+    Retry-After, circuit breaker), so every embed worker reuses the same connections. Vectors
+    are served from and written to the shared embedding cache.
+
+        vectors = BatchEmbedder(API_KEY)(texts)  # one vector (or None) per text
+    """
+
+    def __init__(self, api_key, model=EMBEDDING_MODEL, dim=EMBEDDING_DIM, cache=None, timeout=EMBED_REQUEST_TIMEOUT,
+                 max_retries=EMBED_MAX_RETRIES, pool_maxsize=16):
+        self.api_key = api_key
+        self.model = model
+        self.dim = dim
+        self.cache_model = embedding_cache_model(model, dim)
+        self.cache = cache or get_default_cache()
+        self.timeout = timeout
+        self.http = ResilientTransport(timeout=timeout, max_retries=max_retries, pool_maxsize=pool_maxsize)
+
+    def __call__(self, texts):
+        """Returns a list aligned with texts. Raises if a request fails after its retries."""
+        vectors = self.cache.get_many(self.cache_model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if not missing:
+            return vectors
+        if not self.api_key:
+            raise ValueError("API Key is missing for embedding generation.")
+
+        url = f"{GEMINI_API_BASE}/models/{self.model}:batchEmbedContents?key={self.api_key}"
+        for start in range(0, len(missing), MAX_EMBED_BATCH):
+            idx = missing[start:start + MAX_EMBED_BATCH]
+            batch = [texts[i] for i in idx]
+            payload = {"requests": [embedding_request(text, self.model, self.dim) for text in batch]}
+            resp = self.http.post(url, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            embeddings = [e.get('values') for e in resp.json()['embeddings']]
+            for i, vector in zip(idx, embeddings):
+                vectors[i] = vector
+            self.cache.put_many(self.cache_model, batch, embeddings)
+        return vectors
+
+    def close(self):
+        self.http.close()
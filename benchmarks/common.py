@@ -0,0 +1,44 @@
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+
+WORDS = ("python sql sales engineering manager analyst data cloud aws marketing leadership "
+         "forecasting negotiation kubernetes finance hospitality design research support").split()
+
+
+def make_client(url=None, prefer_grpc=False):
+    """Qdrant client for benchmarks: a real server when url is given, otherwise in-process."""
+    if url:
+        return QdrantClient(url=url, prefer_grpc=prefer_grpc, check_compatibility=False)
+    return QdrantClient(":memory:")
+
+
+def synthetic_vectors(n, dim, seed=0, clusters=50):
+    # Clustered rather than uniform noise so nearest-neighbour structure looks like real embeddings
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=n)] + rng.normal(scale=0.6, size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_text(rng, length=700):
+    text = ""
+    while len(text) < length:
+        text += rng.choice(WORDS) + " "
+    return text[:length]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def percentiles(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {p: float(np.percentile(samples, p)) for p in (50, 95, 99)}
+
+
+def format_percentiles(samples_ms):
+    stats = percentiles(samples_ms)
+    return " ".join(f"p{p}={v:.2f}ms" for p, v in stats.items())
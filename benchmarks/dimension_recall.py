@@ -0,0 +1,63 @@
+"""Benchmark: recall cost of reduced-dimensionality embeddings.
+
+text-embedding-004's outputDimensionality returns the leading components of the full
+vector, so this truncates 768-dim vectors to each candidate size, re-normalizes, and
+measures recall@k against full-dimension exact neighbours, plus vector memory and
+search time. Uses the real vectors in the local snapshot (python local_index.py) when
+present, otherwise synthetic ones.
+
+    python -m benchmarks.dimension_recall [--snapshot .cache/resume_knowledge_base.npz]
+"""
+import os
+import argparse
+import time
+import numpy as np
+from local_index import LocalVectorIndex, LOCAL_INDEX_PATH
+from benchmarks.common import synthetic_vectors
+
+DIMENSIONS = [768, 512, 384, 256, 128]
+
+
+def top_k(matrix, queries, k):
+    scores = queries @ matrix.T
+    return np.argpartition(-scores, k, axis=1)[:, :k]
+
+
+def truncate(vectors, dim):
+    cut = vectors[:, :dim]
+    return cut / np.linalg.norm(cut, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", default=LOCAL_INDEX_PATH)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--points", type=int, default=20000, help="Synthetic corpus size when no snapshot exists")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if os.path.exists(args.snapshot):
+        vectors = LocalVectorIndex.load(args.snapshot).vectors
+        print(f"Using {len(vectors)} vectors from {args.snapshot}")
+    else:
+        vectors = synthetic_vectors(args.points, 768)
+        print(f"No snapshot at {args.snapshot}; using {len(vectors)} synthetic vectors (recall is only indicative)")
+
+    # Hold out queries so a point is never its own nearest neighbour
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(vectors))
+    queries, corpus = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    truth = top_k(corpus, queries, args.k)
+
+    for dim in [d for d in DIMENSIONS if d <= vectors.shape[1]]:
+        corpus_d, queries_d = truncate(corpus, dim), truncate(queries, dim)
+        started = time.perf_counter()
+        found = top_k(corpus_d, queries_d, args.k)
+        search_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = np.mean([len(set(t).intersection(f)) / args.k for t, f in zip(truth, found)])
+        memory_mb = corpus_d.astype(np.float32).nbytes / 1e6
+        print(f"dim={dim:>4}: recall@{args.k}={recall:.3f}  vectors={memory_mb:7.1f} MB  brute-force={search_ms:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Benchmark: end-to-end latency of the app's LLM flows under concurrent sessions.
+
+Runs against the offline stand-ins (benchmarks.stand_ins), so no API keys are needed and
+provider latency / failures are whatever you inject:
+
+    python -m benchmarks.end_to_end --sessions 20 --iterations 5 \
+        --gemini-latency-ms 800 --groq-latency-ms 400 --jitter-ms 200 --error-rate 0.02
+
+All sessions share one agent and one Groq client, as the app's app_clients.get_agent /
+get_groq do, and every flow is timed separately: generate_strategy (Main_Page), cover letter (Main_Page), CV
+compiler (pages/4_CV_Compiler.py) and feedback loop (pages/2_Feedback_Loop.py: persona
+feedback, then interview questions). Reports p50/p95/p99 per flow.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from groq import Groq
+import agent
+from agent import JobSearchAgent
+from embedding_cache import EmbeddingCache
+from opportunity_store import OpportunityStore
+from strategy_cache import InMemoryStrategyCache
+from benchmarks.common import synthetic_text, format_percentiles
+from benchmarks.stand_ins import StandIns, ServiceProfile
+
+FLOWS = ("strategy", "cover_letter", "cv_compiler", "feedback_loop")
+JD_TEXT = ("We are hiring a data analyst with strong SQL, Python and stakeholder management skills. "
+           "Experience with forecasting and dashboards is a plus.")
+
+# Same shape and truncation as the prompts the pages send
+COVER_LETTER_PROMPT = """
+You are an expert career coach. Write a professional cover letter.
+CANDIDATE INFO: {cv}
+JOB DESCRIPTION: {jd}
+INSTRUCTIONS: Match skills to job. Professional tone. No placeholders.
+"""
+CV_COMPILER_PROMPT = """
+Act as an ATS Optimization Expert.
+JOB DESCRIPTION: {jd}
+CURRENT CV: {cv}
+
+TASK: Rewrite the CV bullet points to include relevant keywords from the job description.
+Output ONLY plain text bullet points.
+"""
+PERSONA_PROMPT = """
+You are a strict Corporate HR manager at a Fortune 500 company. Focus on compliance, culture fit, and formal qualifications.
+
+Review this CV for this job:
+CV: {cv}
+Job: {jd}
+
+Give your honest feedback in 3-4 bullet points. Be specific.
+"""
+QUESTIONS_PROMPT = """
+Analyze this CV against the Job Description and predict 5 tough interview questions.
+
+CV Summary: {cv}
+Job Description: {jd}
+
+Return as JSON:
+{{"questions": [{{"question": "...", "reason": "Why they'll ask this", "preparation_tip": "How to prepare"}}]}}
+"""
+
+
+class Session:
+    """One simulated user of the process-wide agent and Groq client."""
+
+    def __init__(self, shared_agent, groq):
+        self.agent = shared_agent
+        self.groq = groq
+
+    def _chat(self, prompt, model="llama-3.3-70b-versatile"):
+        completion = self.groq.chat.completions.create(messages=[{"role": "user", "content": prompt}], model=model)
+        return completion.choices[0].message.content
+
+    def strategy(self, cv_text):
+        # refresh=True: every iteration measures a full retrieval + generation, not a cache hit
+        markdown_text, skill_report, _ = self.agent.generate_strategy(cv_text, "All", refresh=True)
+        if markdown_text.startswith("Error:") or "error" in skill_report:
+            raise RuntimeError(markdown_text[:200] if markdown_text.startswith("Error:") else skill_report["error"])
+
+    def cover_letter(self, cv_text):
+        self._chat(COVER_LETTER_PROMPT.format(cv=cv_text[:4000], jd=JD_TEXT))
+
+    def cv_compiler(self, cv_text):
+        self._chat(CV_COMPILER_PROMPT.format(cv=cv_text[:4000], jd=JD_TEXT))
+
+    def feedback_loop(self, cv_text):
+        self._chat(PERSONA_PROMPT.format(cv=cv_text[:1500], jd=JD_TEXT[:1000]), model="llama-3.1-8b-instant")
+        response = self._chat(QUESTIONS_PROMPT.format(cv=cv_text[:2000], jd=JD_TEXT[:1500]))
+        json.loads(response[response.find("{"):response.rfind("}") + 1])
+
+
+def run_flow(sessions, flow, iterations, seed=0):
+    """Runs `flow` `iterations` times in every session concurrently; returns (latencies_ms, errors, wall_s)."""
+    def session_loop(index, session):
+        rng = np.random.default_rng(seed * 1000 + index)
+        samples, errors = [], []
+        for i in range(iterations):
+            # A distinct CV per call, so exact-match caches never short-circuit the flow
+            cv_text = f"Candidate {index}-{i}\n" + synthetic_text(rng, 3000)
+            started = time.perf_counter()
+            try:
+                getattr(session, flow)(cv_text)
+            except Exception as e:
+                errors.append(str(e))
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        results = list(pool.map(session_loop, range(len(sessions)), sessions))
+    wall_s = time.perf_counter() - started
+    samples = [ms for session_samples, _ in results for ms in session_samples]
+    errors = [error for _, session_errors in results for error in session_errors]
+    return samples, errors, wall_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=5, help="Calls per session and flow")
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=list(FLOWS))
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--groq-latency-ms", type=float, default=200.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+
+    profiles = {
+        "gemini": ServiceProfile(args.gemini_latency_ms, args.jitter_ms, error_status=args.error_status),
+        "groq": ServiceProfile(args.groq_latency_ms, args.jitter_ms, error_status=args.error_status),
+        "qdrant": ServiceProfile(args.qdrant_latency_ms, args.jitter_ms / 10, error_status=args.error_status),
+    }
+    with StandIns(profiles=profiles, n_points=args.points) as stand_ins:
+        agent.GEMINI_API_BASE = stand_ins.gemini_url
+        # One agent and Groq client for every session, like app_clients; memory-only caches keep ./.cache untouched
+        shared_agent = JobSearchAgent(
+            "stand-in", stand_ins.qdrant_url, None,
+            embedding_cache=EmbeddingCache(path=None), strategy_cache=InMemoryStrategyCache(),
+            opportunity_store=OpportunityStore(":memory:"), use_semantic_cache=False,
+        )
+        groq = Groq(api_key="stand-in", base_url=stand_ins.groq_url)
+        sessions = [Session(shared_agent, groq) for _ in range(args.sessions)]
+        # Failures are injected only once the sessions are connected, as in a running deployment
+        for profile in profiles.values():
+            profile.error_rate = args.error_rate
+        print(f"{args.sessions} sessions x {args.iterations} iterations, "
+              f"latency gemini={args.gemini_latency_ms}ms groq={args.groq_latency_ms}ms "
+              f"qdrant={args.qdrant_latency_ms}ms (+/-{args.jitter_ms}ms), error rate {args.error_rate:.1%}")
+
+        for flow in args.flows:
+            samples, errors, wall_s = run_flow(sessions, flow, args.iterations)
+            print(f"{flow:14s} {format_percentiles(samples)}  "
+                  f"{len(samples) / wall_s:.1f} calls/s  errors={len(errors)}/{len(samples)}")
+            if errors:
+                print(f"{'':14s} first error: {errors[0][:120]}")
+        print(f"Stand-in requests: {stand_ins.requests}")
+
+
+if __name__ == "__main__":
+    main()
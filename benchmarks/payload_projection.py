@@ -0,0 +1,76 @@
+"""Benchmark: full payloads vs. projected snippet payloads for knowledge-base search.
+
+Compares what search_knowledge_base used to request (with_payload=True) with the
+projected fields it requests now (rag_config.SEARCH_PAYLOAD_FIELDS).
+
+    python -m benchmarks.payload_projection [--url http://localhost:6333] [--points 5000]
+"""
+import json
+import argparse
+import uuid
+import numpy as np
+from qdrant_client import models
+from rag_config import SEARCH_PAYLOAD_FIELDS, make_snippet
+from benchmarks.common import make_client, synthetic_vectors, synthetic_text, timed, format_percentiles
+
+COLLECTION = "bench_payload_projection"
+
+
+def populate(client, n_points, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+    )
+    vectors = synthetic_vectors(n_points, dim, seed)
+    for start in range(0, n_points, 500):
+        points = []
+        for i in range(start, min(start + 500, n_points)):
+            text = synthetic_text(rng)
+            points.append(models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=vectors[i].tolist(),
+                payload={"text": text, "snippet": make_snippet(text), "source_file": f"resume_{i // 4}.pdf",
+                         "person_id": str(i), "role": rng.choice(["Data Science", "Sales", "Engineering"])}
+            ))
+        client.upsert(collection_name=COLLECTION, points=points, wait=True)
+    return vectors
+
+
+def run(client, queries, k, with_payload):
+    latencies, payload_bytes = [], []
+    for query in queries:
+        response, ms = timed(client.query_points, collection_name=COLLECTION, query=query.tolist(),
+                             limit=k, with_payload=with_payload)
+        latencies.append(ms)
+        payload_bytes.append(len(json.dumps([p.payload for p in response.points]).encode("utf-8")))
+    return latencies, payload_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Qdrant URL (default: in-process client)")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    vectors = populate(client, args.points, args.dim)
+    queries = vectors[np.random.default_rng(1).choice(len(vectors), size=args.queries)]
+
+    try:
+        # Warm up once so the first timed variant does not pay connection setup
+        run(client, queries[:10], args.k, True)
+        for label, with_payload in (("full payload", True), ("projected", SEARCH_PAYLOAD_FIELDS)):
+            latencies, payload_bytes = run(client, queries, args.k, with_payload)
+            print(f"{label:>13}: {np.mean(payload_bytes):8.0f} payload bytes/query  {format_percentiles(latencies)}")
+    finally:
+        client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
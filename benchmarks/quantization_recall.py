@@ -0,0 +1,81 @@
+"""Benchmark: recall and latency of scalar/binary quantization vs. the float32 baseline.
+
+Ground truth is an exact (brute-force) search on the unquantized collection. The
+in-process client ignores quantization, so point this at a real Qdrant:
+    python -m benchmarks.quantization_recall --url http://localhost:6333
+"""
+import argparse
+import uuid
+import time
+import numpy as np
+from qdrant_client import models
+from rag_config import quantization_config, vectors_config, quantization_search_params
+from benchmarks.common import make_client, synthetic_vectors, timed, format_percentiles
+
+VARIANTS = [
+    # (label, quantization kind, search params)
+    ("float32 HNSW", "none", None),
+    ("int8 + rescore", "scalar", quantization_search_params(2.0, True)),
+    ("int8 no rescore", "scalar", quantization_search_params(1.0, False)),
+    ("binary + rescore", "binary", quantization_search_params(3.0, True)),
+]
+
+
+def create(client, name, kind, vectors):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=vectors_config(vectors.shape[1], kind),
+        quantization_config=quantization_config(kind)
+    )
+    for start in range(0, len(vectors), 1000):
+        client.upsert(collection_name=name, wait=True, points=[
+            models.PointStruct(id=i, vector=vectors[i].tolist()) for i in range(start, min(start + 1000, len(vectors)))
+        ])
+    # Let the optimizer finish building HNSW / quantized segments before timing
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+
+def search_ids(client, name, query, k, params):
+    response, ms = timed(client.query_points, collection_name=name, query=query.tolist(), limit=k,
+                         search_params=params, with_payload=False)
+    return [p.id for p in response.points], ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    vectors = synthetic_vectors(args.points, args.dim)
+    queries = synthetic_vectors(args.queries, args.dim, seed=1)
+    names = {kind: f"bench_quant_{kind}_{uuid.uuid4().hex[:6]}" for kind in ("none", "scalar", "binary")}
+
+    try:
+        for kind, name in names.items():
+            create(client, name, kind, vectors)
+
+        exact = models.SearchParams(exact=True)
+        truth = [set(search_ids(client, names["none"], q, args.k, exact)[0]) for q in queries]
+
+        for label, kind, params in VARIANTS:
+            recalls, latencies = [], []
+            for query, expected in zip(queries, truth):
+                ids, ms = search_ids(client, names[kind], query, args.k, params)
+                recalls.append(len(expected.intersection(ids)) / args.k)
+                latencies.append(ms)
+            print(f"{label:>17}: recall@{args.k}={np.mean(recalls):.3f}  {format_percentiles(latencies)}")
+    finally:
+        for name in names.values():
+            client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: REST vs. gRPC transport for the agent's Qdrant searches, single and batched.
+
+Needs a running Qdrant with both ports open, e.g.
+    docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python -m benchmarks.rest_vs_grpc --url http://localhost:6333
+"""
+import argparse
+import uuid
+import numpy as np
+from qdrant_client import models
+from rag_config import SEARCH_PAYLOAD_FIELDS
+from benchmarks.common import make_client, synthetic_vectors, synthetic_text, timed, format_percentiles
+
+COLLECTION = "bench_rest_vs_grpc"
+ROLES = ["Data Science", "Sales", "Engineering"]
+
+
+def populate(client, n_points, dim):
+    rng = np.random.default_rng(0)
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+    )
+    vectors = synthetic_vectors(n_points, dim)
+    for start in range(0, n_points, 500):
+        client.upsert(collection_name=COLLECTION, wait=True, points=[
+            models.PointStruct(id=str(uuid.uuid4()), vector=vectors[i].tolist(),
+                               payload={"snippet": synthetic_text(rng, 600), "role": ROLES[i % len(ROLES)]})
+            for i in range(start, min(start + 500, n_points))
+        ])
+    return vectors
+
+
+def role_filter(role):
+    return models.Filter(must=[models.FieldCondition(key="role", match=models.MatchValue(value=role))])
+
+
+def bench(client, queries, k):
+    single, batched = [], []
+    for query in queries:
+        vector = query.tolist()
+        _, ms = timed(client.query_points, collection_name=COLLECTION, query=vector, limit=k,
+                      with_payload=SEARCH_PAYLOAD_FIELDS)
+        single.append(ms)
+        # One round-trip for every role filter, as search_knowledge_base_batch does
+        requests_ = [models.QueryRequest(query=vector, filter=role_filter(role), limit=k, with_payload=SEARCH_PAYLOAD_FIELDS)
+                     for role in ROLES]
+        _, ms = timed(client.query_batch_points, collection_name=COLLECTION, requests=requests_)
+        batched.append(ms)
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    vectors = populate(make_client(args.url), args.points, args.dim)
+    queries = vectors[np.random.default_rng(1).choice(len(vectors), size=args.queries)]
+    try:
+        for label, prefer_grpc in (("REST", False), ("gRPC", True)):
+            client = make_client(args.url, prefer_grpc=prefer_grpc)
+            bench(client, queries[:20], args.k)  # warm-up
+            single, batched = bench(client, queries, args.k)
+            print(f"{label:>4} single : {format_percentiles(single)}")
+            print(f"{label:>4} batch x{len(ROLES)}: {format_percentiles(batched)}")
+    finally:
+        make_client(args.url).delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
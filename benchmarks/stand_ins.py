@@ -0,0 +1,351 @@
+"""Offline stand-ins for the Gemini, Groq and Qdrant endpoints the app calls.
+
+Each service runs as its own local HTTP server so per-host behaviour (connection pools,
+circuit breakers) matches production. Latency and failures are injected per service:
+
+    python -m benchmarks.stand_ins --gemini-latency-ms 800 --groq-latency-ms 400 --error-rate 0.02
+
+then point the app at them with the printed GEMINI_API_BASE / GROQ_BASE_URL / QDRANT_HOST.
+Supabase is not stood in: the benchmarked flows run with the in-memory strategy cache.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from importlib.metadata import version
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+import numpy as np
+from qdrant_client import QdrantClient, models
+from rag_config import EMBEDDING_DIM, COLLECTION_NAME, make_snippet
+from role_taxonomy import ROLE_CATEGORIES
+from benchmarks.common import synthetic_vectors, synthetic_text
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+             "Cyberdyne", "Soylent", "Tyrell", "Wonka", "Oscorp", "Vandelay", "Dunder Mifflin", "Pied Piper"]
+
+
+@dataclass
+class ServiceProfile:
+    """Injected behaviour for one stand-in service.
+
+    fail_next / slow_next make the next N requests fail / take slow_ms, for deterministic tests.
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: float = None
+    fail_next: int = 0
+    slow_next: int = 0
+    slow_ms: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def _take(self, name):
+        with self._lock:
+            if getattr(self, name) <= 0: return False
+            setattr(self, name, getattr(self, name) - 1)
+            return True
+
+    def delay(self):
+        seconds = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if self._take("slow_next"): seconds = self.slow_ms / 1000
+        if seconds: time.sleep(seconds)
+
+    def should_fail(self):
+        if self._take("fail_next"): return True
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+def fake_embedding(text, dim):
+    # Deterministic per text, so embedding caches behave as they would against the real API
+    rng = np.random.default_rng(int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little"))
+    vector = rng.normal(size=dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def fake_strategy(rows=20):
+    domestic = "\n".join(
+        f"| {COMPANIES[i % len(COMPANIES)]} {i} | Analyst | Skills overlap | [Apply Here](https://careers.example{i}.com) |"
+        for i in range(rows))
+    international = "\n".join(
+        f"| {COMPANIES[i % len(COMPANIES)]} Intl {i} | Germany | EU Blue Card | [Apply Here](https://jobs.example{i}.de) |"
+        for i in range(rows))
+    return (
+        "### 🏠 Domestic Opportunities\n| Company | Role | Match Reason | Application Link |\n"
+        f"| :--- | :--- | :--- | :--- |\n{domestic}\n\n"
+        "### 🌍 International Sponsorship Targets\n| Company | Location | Visa Path | Application Link |\n"
+        f"| :--- | :--- | :--- | :--- |\n{international}\n\n"
+        "### 🚀 Execution Plan\n* **Step 1:** Tailor the CV\n* **Step 2:** Apply to the top ten\n"
+    )
+
+
+def _usage(prompt_text, output_text):
+    return {"promptTokenCount": len(prompt_text) // 4, "candidatesTokenCount": len(output_text) // 4,
+            "totalTokenCount": (len(prompt_text) + len(output_text)) // 4}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set on the per-service subclass: the service name and the owning StandIns
+    service = None
+    suite = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, body, status=200, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _handle(self, method):
+        body = self._read_json() if method == "POST" else {}
+        profile = self.suite.profiles[self.service]
+        self.suite.count(self.service)
+        profile.delay()
+        if profile.should_fail():
+            headers = {"Retry-After": str(profile.retry_after)} if profile.retry_after is not None else None
+            return self._send_json({"error": {"message": "injected failure"}}, profile.error_status, headers)
+        try:
+            handler = getattr(self.suite, f"_{self.service}")
+            result = handler(method, urlsplit(self.path).path, body, self)
+        except Exception as e:
+            return self._send_json({"error": {"message": str(e)}}, 500)
+        if isinstance(result, tuple):
+            self._send_json(*result)
+        elif result is not None:
+            self._send_json(result)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class StandIns:
+    """Starts Gemini, Groq and Qdrant stand-ins on free local ports.
+
+        with StandIns(profiles={"gemini": ServiceProfile(latency_ms=800)}) as stand_ins:
+            agent = JobSearchAgent("key", stand_ins.qdrant_url, None)  # with GEMINI_API_BASE = stand_ins.gemini_url
+    """
+
+    SERVICES = ("gemini", "groq", "qdrant")
+
+    def __init__(self, profiles=None, n_points=2000, dim=EMBEDDING_DIM, collection_name=COLLECTION_NAME,
+                 host="127.0.0.1", ports=None, stream_chunks=8):
+        self.profiles = {name: ServiceProfile() for name in self.SERVICES}
+        self.profiles.update(profiles or {})
+        self.dim = dim
+        self.collection_name = collection_name
+        self.stream_chunks = stream_chunks
+        self.requests = dict.fromkeys(self.SERVICES, 0)
+        self._lock = threading.Lock()
+        # The in-process Qdrant client is not meant for concurrent use, so searches are serialised
+        self._qdrant_lock = threading.Lock()
+        self._qdrant_store = self._seed_qdrant(n_points)
+        self._servers = {}
+        for name in self.SERVICES:
+            handler = type(f"{name.title()}Handler", (_Handler,), {"service": name, "suite": self})
+            server = ThreadingHTTPServer((host, (ports or {}).get(name, 0)), handler)
+            server.daemon_threads = True
+            self._servers[name] = server
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def url(self, name):
+        host, port = self._servers[name].server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def gemini_url(self):
+        return self.url("gemini") + "/v1beta"
+
+    @property
+    def groq_url(self):
+        return self.url("groq")
+
+    @property
+    def qdrant_url(self):
+        return self.url("qdrant")
+
+    def count(self, name):
+        with self._lock:
+            self.requests[name] += 1
+
+    def _seed_qdrant(self, n_points):
+        client = QdrantClient(":memory:")
+        client.create_collection(self.collection_name,
+                                 vectors_config=models.VectorParams(size=self.dim, distance=models.Distance.COSINE))
+        rng = np.random.default_rng(0)
+        vectors = synthetic_vectors(n_points, self.dim)
+        points = []
+        for i in range(n_points):
+            text = synthetic_text(rng)
+            points.append(models.PointStruct(id=str(uuid.uuid4()), vector=vectors[i].tolist(), payload={
+                "text": text, "snippet": make_snippet(text), "role": ROLE_CATEGORIES[i % len(ROLE_CATEGORIES)],
+                "source_file": f"resume_{i // 4}.pdf"
+            }))
+        for start in range(0, n_points, 500):
+            client.upsert(self.collection_name, points=points[start:start + 500])
+        return client
+
+    # --- Gemini ---
+    def _gemini(self, method, path, body, handler):
+        if path.endswith(":batchEmbedContents"):
+            return {"embeddings": [
+                {"values": fake_embedding(r["content"]["parts"][0]["text"], r.get("outputDimensionality", self.dim))}
+                for r in body.get("requests", [])]}
+        if path.endswith(":embedContent"):
+            return {"embedding": {"values": fake_embedding(body["content"]["parts"][0]["text"],
+                                                           body.get("outputDimensionality", self.dim))}}
+
+        prompt = body["contents"][0]["parts"][0]["text"]
+        if body.get("generationConfig", {}).get("responseSchema"):
+            text = json.dumps({"predictive_score": 72, "weakest_link_skill": "SQL", "tech_score": 68, "leader_score": 55})
+        else:
+            text = fake_strategy()
+        candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}
+        if body.get("tools"):
+            candidate["groundingMetadata"] = {"groundingChunks": [
+                {"web": {"uri": f"https://careers.example{i}.com", "title": f"example{i}.com"}} for i in range(3)]}
+
+        if path.endswith(":streamGenerateContent"):
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/event-stream")
+            handler.send_header("Connection", "close")
+            handler.end_headers()
+            step = max(1, len(text) // self.stream_chunks)
+            for start in range(0, len(text), step):
+                chunk = {"candidates": [{"content": {"parts": [{"text": text[start:start + step]}], "role": "model"}}],
+                         "usageMetadata": _usage(prompt, text[:start + step])}
+                if start + step >= len(text) and "groundingMetadata" in candidate:
+                    chunk["candidates"][0]["groundingMetadata"] = candidate["groundingMetadata"]
+                handler.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8"))
+                handler.wfile.flush()
+            handler.close_connection = True
+            return None
+        return {"candidates": [candidate], "usageMetadata": _usage(prompt, text)}
+
+    # --- Groq (OpenAI-compatible chat completions) ---
+    def _groq(self, method, path, body, handler):
+        if not path.endswith("/chat/completions"):
+            return {"error": {"message": f"unknown path {path}"}}, 404
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        if "JSON" in prompt:
+            content = json.dumps({"questions": [
+                {"question": f"Tell me about a time you used skill {i}.", "reason": "Gap in CV",
+                 "preparation_tip": "Use a STAR story."} for i in range(5)]})
+        else:
+            content = "\n".join(f"- Stand-in bullet point {i} for the requested document." for i in range(12))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "llama-3.3-70b-versatile"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    # --- Qdrant (REST subset used by the agent, backed by an in-process collection) ---
+    def _qdrant(self, method, path, body, handler):
+        started = time.perf_counter()
+        if path in ("", "/"):
+            # Report the client's own version so its compatibility check passes
+            return {"title": "qdrant - vector search engine", "version": version("qdrant-client")}
+
+        match = re.fullmatch(r"/collections/([^/]+)(/.*)?", path)
+        if not match:
+            return {"status": {"error": f"unknown path {path}"}}, 404
+        collection, rest = match.group(1), match.group(2) or ""
+        if method == "GET" and rest == "/exists":
+            # Used by the agents' periodic health check (collection_exists)
+            return {"result": {"exists": collection == self.collection_name}, "status": "ok",
+                    "time": time.perf_counter() - started}
+        if collection != self.collection_name:
+            return {"status": {"error": f"Collection `{collection}` doesn't exist!"}}, 404
+
+        with self._qdrant_lock:
+            result = self._qdrant_call(method, collection, rest, body)
+        if result is None:
+            return {"status": {"error": f"unsupported {method} {path}"}}, 404
+        return {"result": result, "status": "ok", "time": time.perf_counter() - started}
+
+    def _qdrant_call(self, method, collection, rest, body):
+        if method == "GET" and rest == "":
+            result = self._qdrant_store.get_collection(collection).model_dump(mode="json")
+        elif rest == "/points/query/batch":
+            batch = models.QueryRequestBatch(**body)
+            # Local mode is exact search anyway; dropping search params avoids a warning per request
+            searches = [search.model_copy(update={"params": None}) for search in batch.searches]
+            responses = self._qdrant_store.query_batch_points(collection, requests=searches)
+            result = [response.model_dump(mode="json") for response in responses]
+        elif rest == "/points/query":
+            request = models.QueryRequest(**body)
+            result = self._qdrant_store.query_points(
+                collection, query=request.query, query_filter=request.filter, limit=request.limit or 10,
+                with_payload=request.with_payload, with_vectors=request.with_vector or False
+            ).model_dump(mode="json")
+        elif rest == "/points":
+            request = models.PointRequest(**body)
+            records = self._qdrant_store.retrieve(collection, ids=request.ids, with_payload=request.with_payload,
+                                            with_vectors=request.with_vector or False)
+            result = [record.model_dump(mode="json") for record in records]
+        else:
+            result = None
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for name in StandIns.SERVICES:
+        parser.add_argument(f"--{name}-port", type=int, default=0)
+        parser.add_argument(f"--{name}-latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+
+    profiles = {
+        name: ServiceProfile(getattr(args, f"{name}_latency_ms"), args.jitter_ms, args.error_rate, args.error_status)
+        for name in StandIns.SERVICES
+    }
+    ports = {name: getattr(args, f"{name}_port") for name in StandIns.SERVICES}
+    stand_ins = StandIns(profiles=profiles, n_points=args.points, ports=ports)
+    print(f"GEMINI_API_BASE={stand_ins.gemini_url}")
+    print(f"GROQ_BASE_URL={stand_ins.groq_url}")
+    print(f"QDRANT_HOST={stand_ins.qdrant_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stand_ins.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+
+# --- Context Selection Defaults ---
+MMR_LAMBDA = 0.7             # 1.0 = pure relevance, 0.0 = pure diversity
+MMR_OVERFETCH = 4            # fetch k * MMR_OVERFETCH candidates to choose from
+MAX_PER_SOURCE = 2           # at most this many chunks from one resume (see source_key)
+DUPLICATE_THRESHOLD = 0.95   # cosine above which two chunks count as the same text
+CONTEXT_TOKEN_BUDGET = 1500
+
+
+def estimate_tokens(text):
+    # Gemini averages roughly four characters per token for English prose
+    return (len(text or "") + 3) // 4
+
+
+def source_key(payload):
+    """The resume a chunk belongs to: its file, or for the bulk CSV dataset (one source_file
+    shared by every row) the person_id within it."""
+    payload = payload or {}
+    source = payload.get("source_file")
+    person_id = payload.get("person_id")
+    if source and person_id is not None:
+        return f"{source}:{person_id}"
+    return source
+
+
+def _unit(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(hits, query_vector, k, text_of, lambda_=MMR_LAMBDA, max_per_source=MAX_PER_SOURCE,
+               duplicate_threshold=DUPLICATE_THRESHOLD, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Picks up to k hits by maximal marginal relevance.
+
+    Each step takes the hit maximising lambda * sim(query) - (1 - lambda) * max sim(selected),
+    skipping near-duplicates of already selected chunks, hits from a resume (source_key) that
+    already has max_per_source chunks, and hits that would overflow token_budget. Hits without vectors
+    are passed through in rank order.
+    """
+    hits = [hit for hit in hits if text_of(hit)]
+    if not hits: return []
+    if any(getattr(hit, "vector", None) is None for hit in hits) or query_vector is None:
+        return hits[:k]
+
+    vectors = _unit([hit.vector for hit in hits])
+    relevance = vectors @ _unit(query_vector)
+    pairwise = vectors @ vectors.T
+
+    selected, per_source, tokens = [], {}, 0
+    remaining = set(range(len(hits)))
+    while remaining and len(selected) < k:
+        if selected:
+            redundancy = pairwise[:, selected].max(axis=1)
+        else:
+            redundancy = np.zeros(len(hits), dtype=np.float32)
+        scores = lambda_ * relevance - (1 - lambda_) * redundancy
+        best = max(remaining, key=lambda i: scores[i])
+        remaining.discard(best)
+
+        hit = hits[best]
+        source = source_key(hit.payload)
+        cost = estimate_tokens(text_of(hit))
+        if selected and redundancy[best] >= duplicate_threshold:
+            continue
+        if source and per_source.get(source, 0) >= max_per_source:
+            continue
+        if selected and tokens + cost > token_budget:
+            continue
+
+        selected.append(best)
+        tokens += cost
+        if source: per_source[source] = per_source.get(source, 0) + 1
+    return [hits[i] for i in selected]
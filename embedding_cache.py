@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# --- Embedding Cache Config ---
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "./.cache/embeddings.sqlite")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.environ.get("EMBEDDING_CACHE_MEMORY_ITEMS", "5000"))
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by (model, sha256(text)).
+
+    Tier 1 is a bounded in-memory LRU of float32 arrays (~3 KB per 768-dim vector,
+    converted to lists only when returned); tier 2 is a SQLite table of float32 blobs
+    that survives restarts and is shared by the agent and the ingestion scripts.
+    Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_memory_items=EMBEDDING_CACHE_MEMORY_ITEMS):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._init_db(path) if path else None
+        self.hits = 0
+        self.misses = 0
+
+    def _init_db(self, path):
+        try:
+            folder = os.path.dirname(path)
+            if folder: os.makedirs(folder, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_sha TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_sha))"
+            )
+            db.commit()
+            return db
+        except Exception as e:
+            print(f"Embedding Cache Warning: disk tier disabled ({e})")
+            return None
+
+    def _remember(self, key, vector):
+        # Caller holds the lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model, texts):
+        """Returns a list aligned with texts: cached vector or None."""
+        keys = [(model, text_hash(t)) for t in texts]
+        results = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key].tolist()
+                else:
+                    missing.setdefault(key[1], []).append(i)
+
+            if missing and self._db is not None:
+                shas = list(missing)
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(shas), 500):
+                    chunk = shas[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT text_sha, vector FROM embeddings WHERE model = ? AND text_sha IN ({marks})",
+                        [model, *chunk]
+                    ).fetchall()
+                    for sha, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember((model, sha), vector)
+                        for i in missing[sha]:
+                            results[i] = vector.tolist()
+
+            found = sum(1 for r in results if r is not None)
+            self.hits += found
+            self.misses += len(texts) - found
+        return results
+
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model, texts, vectors):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                if vector is None: continue
+                sha = text_hash(text)
+                vector = np.array(vector, dtype=np.float32)
+                self._remember((model, sha), vector)
+                rows.append((model, sha, vector.tobytes()))
+            if rows and self._db is not None:
+                try:
+                    self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+                    self._db.commit()
+                except Exception as e:
+                    print(f"Embedding Cache Warning: write failed ({e})")
+
+    def put(self, model, text, vector):
+        self.put_many(model, [text], [vector])
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_default_cache():
+    """Process-wide cache instance shared by agent.py, setup_rag.py and ingest_bulk.py."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
@@ -0,0 +1,164 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and transient server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets one probe through after `reset_after` seconds.
+
+    While the probe is in flight (half-open) every other caller is rejected; the probe's outcome
+    closes or re-opens the circuit. A probe that never reports back is replaced after another reset_after.
+    """
+
+    def __init__(self, failure_threshold=5, reset_after=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.half_open = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_after:
+                # Half-open: this caller is the probe; restarting the window keeps everyone else out
+                self.opened_at = now
+                self.half_open = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.half_open = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.half_open or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.half_open = False
+
+
+class ResilientTransport:
+    """Pooled keep-alive HTTP transport with deadlines, retries, a circuit breaker and optional hedging.
+
+    post() mirrors requests.Session.post and returns a requests.Response; once retries are
+    exhausted the last response is returned so callers can still use raise_for_status().
+    """
+
+    def __init__(self, timeout=60.0, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 hedge_after=None, pool_maxsize=16, failure_threshold=5, reset_after=30.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix="hedge")
+
+    def breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._breakers_lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_after)
+            return self._breakers[host]
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (also used by the async agent)."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, url, json=None, timeout=None, stream=False, hedge=None):
+        """POSTs with retries until `timeout` seconds (the whole-call deadline) are spent."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        breaker = self.breaker(url)
+        hedge_after = self.hedge_after if hedge is None else hedge
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+            try:
+                if hedge_after and not stream:
+                    resp = self._hedged_post(url, json, remaining, hedge_after)
+                else:
+                    resp = self.session.post(url, json=json, timeout=remaining, stream=stream)
+            except requests.exceptions.RequestException as e:
+                breaker.record_failure()
+                last_error = e
+                time.sleep(min(self.backoff(attempt), max(0, deadline - time.monotonic())))
+                continue
+
+            if resp.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    return resp
+                wait_s = self.backoff(attempt, resp.headers.get("Retry-After"))
+                resp.close()
+                if time.monotonic() + wait_s >= deadline:
+                    return resp
+                time.sleep(wait_s)
+                continue
+
+            breaker.record_success()
+            return resp
+
+        raise last_error or requests.exceptions.Timeout(f"Deadline exceeded for {urlsplit(url).netloc}")
+
+    def _hedged_post(self, url, json, remaining, hedge_after):
+        # Fire a backup request if the first has not answered within hedge_after seconds;
+        # whichever finishes first wins.
+        primary = self._hedge_pool.submit(self.session.post, url, json=json, timeout=remaining)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        backup = self._hedge_pool.submit(self.session.post, url, json=json, timeout=max(0.1, remaining - hedge_after))
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+        raise error
+
+    def close(self):
+        self._hedge_pool.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,84 @@
+import os
+import json
+import uuid
+import hashlib
+from rag_config import COLLECTION_NAME
+
+# --- Index Manifest Config ---
+INDEX_MANIFEST_PATH = os.environ.get("INDEX_MANIFEST_PATH", f"./.cache/{COLLECTION_NAME}_manifest.json")
+# Fixed namespace so the same file + content + chunk index always maps to the same point ID
+POINT_ID_NAMESPACE = uuid.UUID("3f1c9a6e-8d2b-5e4f-9a7c-1b2d3e4f5a6b")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_point_id(source_file, file_sha, chunk_index):
+    """Deterministic point ID: re-indexing unchanged content overwrites instead of duplicating.
+
+    The file name is part of the key so two copies of the same resume keep separate points.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source_file}:{file_sha}:{chunk_index}"))
+
+
+def record_point_id(source, record_id):
+    """Deterministic point ID for one record of a tabular source (e.g. a person_id in the CSV dataset)."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}:{record_id}"))
+
+
+class IndexManifest:
+    """What is in the collection: source file name -> {"sha256", "chunks"} for one collection + embedding model.
+
+    A manifest written for a different collection or embedding model is treated as empty,
+    since none of its vectors would be reusable.
+    """
+
+    def __init__(self, path=INDEX_MANIFEST_PATH, collection_name=COLLECTION_NAME, embedding_model=""):
+        self.path = path
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.files = {}
+
+    @classmethod
+    def load(cls, path=INDEX_MANIFEST_PATH, collection_name=COLLECTION_NAME, embedding_model=""):
+        manifest = cls(path, collection_name, embedding_model)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("collection") == collection_name and data.get("embedding_model") == embedding_model:
+                    manifest.files = data.get("files", {})
+            except Exception as e:
+                print(f"Index Manifest Warning: ignoring unreadable manifest ({e})")
+        return manifest
+
+    def diff(self, current):
+        """Compares {name: sha256} for the files on disk; returns (new, changed, removed) name lists."""
+        new = [name for name in current if name not in self.files]
+        changed = [name for name, sha in current.items() if name in self.files and self.files[name]["sha256"] != sha]
+        removed = [name for name in self.files if name not in current]
+        return new, changed, removed
+
+    def set(self, name, sha, chunks):
+        self.files[name] = {"sha256": sha, "chunks": chunks}
+
+    def remove(self, name):
+        self.files.pop(name, None)
+
+    def clear(self):
+        self.files = {}
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        # Write then rename, so an interrupted run never leaves a half-written manifest
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"collection": self.collection_name, "embedding_model": self.embedding_model,
+                       "files": self.files}, f)
+        os.replace(tmp_path, self.path)
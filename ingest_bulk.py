@@ -1,12 +1,18 @@
 import pandas as pd
-import time
-import uuid
+import argparse
 import os
-import requests
-import json
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient, models
 from tqdm import tqdm
+from rag_config import (
+    make_snippet, ensure_payload_indexes, quantization_config, vectors_config, QUANTIZATION_KINDS,
+    EMBEDDING_DIM, COLLECTION_NAME, embedding_cache_model
+)
+from role_taxonomy import categorize_role
+from batch_embedder import BatchEmbedder
+from ingest_pipeline import IngestPipeline, INGEST_EMBED_WORKERS, INGEST_UPSERT_CONCURRENCY
+from index_manifest import record_point_id
+from ingest_checkpoint import IngestCheckpoint, checkpoint_path
 
 # --- 1. CONFIGURATION (Same as setup_rag.py) ---
 load_dotenv()
@@ -14,37 +20,10 @@ load_dotenv()
 API_KEY = os.environ.get("GEMINI_API_KEY", "")
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "YOUR_CLOUD_URL_HERE") # Ensure this is your Cloud URL
 QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY", "")
-COLLECTION_NAME = 'resume_knowledge_base'
-EMBEDDING_MODEL = "text-embedding-004"
-EMBEDDING_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{EMBEDDING_MODEL}:embedContent?key={API_KEY}"
+# Model, dimensionality and collection name come from rag_config (EMBEDDING_DIM env var)
+CACHE_MODEL = embedding_cache_model()
 
-# --- 2. DEFINE THE EMBEDDING FUNCTION (Reused) ---
-def get_embedding(text):
-    """Calls Gemini API to get a single embedding vector (Identical to setup_rag.py)."""
-    if not API_KEY:
-        raise ValueError("API Key is missing.")
-        
-    payload = { "model": EMBEDDING_MODEL, "content": { "parts": [{ "text": text }] } }
-    
-    # Retry logic for rate limits (Important for 54k items)
-    for attempt in range(5):
-        try:
-            response = requests.post(
-                EMBEDDING_API_URL,
-                headers={'Content-Type': 'application/json'},
-                data=json.dumps(payload)
-            )
-            if response.status_code == 429: # Rate limit hit
-                time.sleep(5 * (attempt + 1)) # Backoff
-                continue
-                
-            response.raise_for_status()
-            return response.json()['embedding']['values']
-        except Exception as e:
-            time.sleep(2)
-            continue
-    print(f"Failed to embed text: {text[:50]}...")
-    return None
+# --- 2. EMBEDDING: batchEmbedContents calls on a pooled session (batch_embedder.py) ---
 
 # --- 3. MERGE DATA (Relational -> Single Text) ---
 def load_and_merge_data():
@@ -78,56 +57,78 @@ def load_and_merge_data():
 
 # --- 4. MAIN EXECUTION ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed the Kaggle resume CSVs into Qdrant.")
+    parser.add_argument("--quantization", choices=QUANTIZATION_KINDS,
+                        help="Create the collection with, or switch an existing one to, this quantization")
+    parser.add_argument("--batch-size", type=int, default=100, help="Points per upsert request")
+    parser.add_argument("--embed-workers", type=int, default=INGEST_EMBED_WORKERS,
+                        help="Concurrent embedding requests (lower it if Gemini rate-limits)")
+    parser.add_argument("--upsert-concurrency", type=int, default=INGEST_UPSERT_CONCURRENCY,
+                        help="Upsert batches in flight at once")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue a failed run from its checkpoint instead of starting over")
+    args = parser.parse_args()
+
     # Initialize Qdrant
     qdrant = QdrantClient(url=QDRANT_HOST, api_key=QDRANT_API_KEY)
+    if not qdrant.collection_exists(COLLECTION_NAME):
+        qdrant.create_collection(
+            collection_name=COLLECTION_NAME,
+            vectors_config=vectors_config(EMBEDDING_DIM, args.quantization),
+            quantization_config=quantization_config(args.quantization)
+        )
+    elif args.quantization:
+        # Qdrant re-quantizes existing segments in the background
+        qdrant.update_collection(
+            collection_name=COLLECTION_NAME,
+            quantization_config=quantization_config(args.quantization) or models.Disabled.DISABLED
+        )
+    ensure_payload_indexes(qdrant, COLLECTION_NAME)
     
     # Load Data
     df = load_and_merge_data()
     print(f"Total resumes to process: {len(df)}")
 
-    batch_size = 50 
-    points = []
+    def chunk_stream():
+        for index, row in tqdm(df.iterrows(), total=len(df)):
+            # Construct the text representation
+            # We simulate a document structure so the search finds it easily
+            text_content = (
+                f"Candidate Name: {row['name']}\n"
+                f"Skills: {row['skills']}\n"
+                f"Experience: {row['experience']}"
+            )
 
-    # Iterate and Upload
-    for index, row in tqdm(df.iterrows(), total=len(df)):
-        
-        # Construct the text representation
-        # We simulate a document structure so the search finds it easily
-        text_content = (
-            f"Candidate Name: {row['name']}\n"
-            f"Skills: {row['skills']}\n"
-            f"Experience: {row['experience']}"
-        )
-        
-        # Skip empty data
-        if len(text_content) < 50: continue
+            # Skip empty data
+            if len(text_content) < 50: continue
 
-        # Get Embedding (Gemini)
-        vector = get_embedding(text_content)
-        
-        if vector:
-            points.append(models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
-                payload={
-                    "text": text_content,
-                    "source_file": "kaggle_54k_dataset",
-                    "person_id": str(row['person_id']),
-                    "role": row['name']
-                }
-            ))
+            yield text_content, {
+                "text": text_content,
+                "snippet": make_snippet(text_content),
+                "source_file": "kaggle_54k_dataset",
+                "person_id": str(row['person_id']),
+                "candidate_name": row['name'],
+                # Normalized category the dashboard's role filter matches (was the candidate's name)
+                "role": categorize_role(f"{row['skills']} {row['experience']}", row['experience'])
+            }
 
-        # Upload Batch
-        if len(points) >= batch_size:
-            try:
-                qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
-                points = [] # Clear batch
-                time.sleep(0.5) # Small pause to be nice to Gemini API
-            except Exception as e:
-                print(f"Error uploading batch: {e}")
+    # Embedding and upserting overlap; only the bounded queues' worth of points is ever in memory.
+    # One point ID per person_id, so re-running the import overwrites instead of duplicating.
+    embedder = BatchEmbedder(API_KEY, pool_maxsize=args.embed_workers)
+    pipeline = IngestPipeline(qdrant, COLLECTION_NAME, embedder, batch_size=args.batch_size,
+                              embed_workers=args.embed_workers, upsert_concurrency=args.upsert_concurrency,
+                              point_id=lambda text, payload: record_point_id(payload["source_file"], payload["person_id"]),
+                              checkpoint=IngestCheckpoint(checkpoint_path("ingest_bulk"), COLLECTION_NAME,
+                                                          CACHE_MODEL, resume=args.resume))
+    try:
+        stats = pipeline.run(chunk_stream())
+    except RuntimeError as e:
+        print(f"\n--- FAILURE: {e} ---")
+        raise SystemExit(1)
+    finally:
+        embedder.close()
+    pipeline.checkpoint.clear()
+    if stats["resumed"] or stats["replayed"]:
+        print(f"Resumed: {stats['resumed']} resumes already embedded, {stats['replayed']} spooled points re-sent.")
 
-    # Final Batch
-    if points:
-        qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
-        
-    print("Done! All resumes added to Qdrant.")
+    print(f"Done! {stats['upserted']} resumes added to Qdrant ({stats['embed_failed']} failed to embed).")
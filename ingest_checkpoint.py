@@ -0,0 +1,93 @@
+import os
+import json
+import sqlite3
+import threading
+import numpy as np
+from qdrant_client import models
+from rag_config import COLLECTION_NAME
+
+# --- Ingestion Checkpoint Config ---
+INGEST_CHECKPOINT_DIR = os.environ.get("INGEST_CHECKPOINT_DIR", "./.cache")
+
+
+def checkpoint_path(run_name, collection_name=COLLECTION_NAME):
+    """One checkpoint file per script and collection, e.g. ./.cache/resume_knowledge_base_setup_rag.ckpt.sqlite"""
+    return os.path.join(INGEST_CHECKPOINT_DIR, f"{collection_name}_{run_name}.ckpt.sqlite")
+
+
+class IngestCheckpoint:
+    """Durable progress of one ingestion run, so a failed run can resume instead of starting over.
+
+    Every embedded point is spooled (vector + payload) before it is upserted. Once its batch is
+    indexed the vector is dropped and only the point ID is kept; those IDs are the progress
+    cursor. On resume, spooled-but-unindexed points are upserted again without re-embedding,
+    and chunks whose point ID is already spooled are skipped. This relies on deterministic
+    point IDs (see index_manifest.py).
+
+    A checkpoint written for another collection or embedding model is discarded.
+    """
+
+    def __init__(self, path, collection_name=COLLECTION_NAME, embedding_model="", resume=False):
+        self.path = path
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "id TEXT PRIMARY KEY, vector BLOB, payload TEXT, indexed INTEGER NOT NULL DEFAULT 0)"
+        )
+        meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        if resume and meta and (meta.get("collection") != collection_name or meta.get("embedding_model") != embedding_model):
+            print(f"Ingest Checkpoint Warning: {path} belongs to another collection/model, starting over")
+            resume = False
+        if not resume:
+            self._db.execute("DELETE FROM points")
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             [("collection", collection_name), ("embedding_model", embedding_model)])
+        self._db.commit()
+        self._done = {row[0] for row in self._db.execute("SELECT id FROM points")}
+
+    def is_done(self, point_id):
+        """True if the point was embedded by an earlier attempt (indexed or still spooled)."""
+        return str(point_id) in self._done
+
+    def pending(self):
+        """Spooled points whose upsert never succeeded, as PointStructs."""
+        with self._lock:
+            rows = self._db.execute("SELECT id, vector, payload FROM points WHERE indexed = 0").fetchall()
+        return [models.PointStruct(id=point_id, vector=np.frombuffer(blob, dtype=np.float32).tolist(),
+                                   payload=json.loads(payload))
+                for point_id, blob, payload in rows]
+
+    def spool(self, point):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, 0)",
+                (str(point.id), np.asarray(point.vector, dtype=np.float32).tobytes(), json.dumps(point.payload))
+            )
+            self._db.commit()
+            self._done.add(str(point.id))
+
+    def mark_indexed(self, point_ids):
+        with self._lock:
+            self._db.executemany("UPDATE points SET indexed = 1, vector = NULL, payload = NULL WHERE id = ?",
+                                 [(str(point_id),) for point_id in point_ids])
+            self._db.commit()
+
+    def counts(self):
+        with self._lock:
+            rows = dict(self._db.execute("SELECT indexed, COUNT(*) FROM points GROUP BY indexed").fetchall())
+        return {"pending": rows.get(0, 0), "indexed": rows.get(1, 0)}
+
+    def clear(self):
+        """Called after a run completes: nothing left to resume."""
+        with self._lock:
+            self._db.execute("DELETE FROM points")
+            self._db.commit()
+            self._done = set()
@@ -0,0 +1,200 @@
+import os
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client import models
+
+# --- Ingestion Pipeline Config ---
+INGEST_EMBED_WORKERS = int(os.environ.get("INGEST_EMBED_WORKERS", "8"))
+INGEST_UPSERT_CONCURRENCY = int(os.environ.get("INGEST_UPSERT_CONCURRENCY", "4"))
+# Chunks per embed_fn call (batchEmbedContents takes at most 100)
+INGEST_EMBED_BATCH = int(os.environ.get("INGEST_EMBED_BATCH", "100"))
+# Items waiting between stages; with the upserts in flight this caps how many points are in memory
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", "1000"))
+UPSERT_RETRIES = 3
+
+_DONE = object()
+
+
+class IngestPipeline:
+    """Streams (text, payload) chunks through embed -> upsert with bounded queues between stages.
+
+    The caller's iterable is the producer (extraction and chunking happen as it is consumed);
+    `embed_workers` threads each take up to `embed_batch_size` queued chunks and call
+    embed_fn(texts) -> [vector or None] once for them, and a batcher sends BATCH_SIZE-point upserts with up
+    to `upsert_concurrency` in flight, so indexing overlaps with embedding and memory stays flat.
+    An upsert that still fails after UPSERT_RETRIES attempts stops the run.
+
+    With a `checkpoint` (ingest_checkpoint.IngestCheckpoint) every embedded point is spooled
+    before it is upserted; a resumed run first re-sends the spooled points that never got
+    indexed and skips chunks an earlier attempt already embedded.
+
+        stats = IngestPipeline(qdrant, COLLECTION_NAME, BatchEmbedder(API_KEY)).run(chunks)
+    """
+
+    def __init__(self, qdrant, collection_name, embed_fn, batch_size=500, embed_workers=INGEST_EMBED_WORKERS,
+                 upsert_concurrency=INGEST_UPSERT_CONCURRENCY, queue_size=INGEST_QUEUE_SIZE, point_id=None,
+                 checkpoint=None, embed_batch_size=INGEST_EMBED_BATCH):
+        self.qdrant = qdrant
+        self.collection_name = collection_name
+        self.embed_fn = embed_fn
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_concurrency = upsert_concurrency
+        self.queue_size = queue_size
+        # point_id(text, payload) -> id; random UUIDs by default
+        self.point_id = point_id or (lambda text, payload: str(uuid.uuid4()))
+        self.checkpoint = checkpoint
+        self.stats = {"chunks": 0, "embedded": 0, "embed_failed": 0, "upserted": 0, "batches": 0,
+                      "resumed": 0, "replayed": 0}
+        # Chunks that failed to embed, per payload source_file (the run goes on without them)
+        self.failed_sources = {}
+        self.error = None
+        self._stats_lock = threading.Lock()
+        self._failed = threading.Event()
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def run(self, chunks):
+        """Consumes (text, payload) pairs; returns the stats dict. Raises if an upsert batch failed."""
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        upsert_queue = queue.Queue(maxsize=self.queue_size)
+        embedders = [threading.Thread(target=self._embed_loop, args=(embed_queue, upsert_queue), daemon=True)
+                     for _ in range(self.embed_workers)]
+        upserter = threading.Thread(target=self._upsert_loop, args=(upsert_queue,), daemon=True)
+        for thread in embedders + [upserter]:
+            thread.start()
+
+        try:
+            if self.checkpoint is not None:
+                # Points embedded by a failed attempt go straight to the upserter
+                for point in self.checkpoint.pending():
+                    if self._failed.is_set(): break
+                    upsert_queue.put(point)
+                    self._count("replayed")
+            for text, payload in chunks:
+                if self._failed.is_set(): break
+                point_id = self.point_id(text, payload)
+                if self.checkpoint is not None and self.checkpoint.is_done(point_id):
+                    self._count("resumed")
+                    continue
+                embed_queue.put((point_id, text, payload))
+                self._count("chunks")
+        finally:
+            # Stops the caller's generator (and any extraction pool behind it) if the run ended early
+            close = getattr(chunks, "close", None)
+            if close: close()
+            for _ in embedders:
+                embed_queue.put(_DONE)
+            for thread in embedders:
+                thread.join()
+            upsert_queue.put(_DONE)
+            upserter.join()
+
+        if self.error is not None:
+            message = f"Indexing stopped: {self.error}"
+            if self.checkpoint is not None:
+                try:
+                    message += (f" ({self.checkpoint.counts()['pending']} embedded points spooled in "
+                                f"{self.checkpoint.path}; re-run with --resume)")
+                except sqlite3.Error:
+                    pass
+            raise RuntimeError(message)
+        return self.stats
+
+    def _fail(self, error, message):
+        # Stops the run: the producer stops feeding, the stages drain without working, run() raises
+        print(f"\n--- FATAL ERROR: {message}. ---")
+        print(f"Original error: {error}")
+        self.error = error
+        self._failed.set()
+
+    def _take_batch(self, embed_queue):
+        """Blocks for one item, then adds whatever else is already queued, up to embed_batch_size.
+
+        Returns (items, done); done means this worker's _DONE marker was taken.
+        """
+        item = embed_queue.get()
+        if item is _DONE: return [], True
+        items = [item]
+        while len(items) < self.embed_batch_size:
+            try:
+                item = embed_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE: return items, True
+            items.append(item)
+        return items, False
+
+    def _embed_loop(self, embed_queue, upsert_queue):
+        done = False
+        while not done:
+            items, done = self._take_batch(embed_queue)
+            if not items or self._failed.is_set(): continue
+            try:
+                vectors = self.embed_fn([text for _, text, _ in items])
+                if len(vectors) != len(items):
+                    raise ValueError(f"got {len(vectors)} vectors for {len(items)} texts")
+            except Exception as e:
+                vectors = [None] * len(items)
+                print(f"Skipping {len(items)} chunks due to embedding error: {e}")
+            for (point_id, _, payload), vector in zip(items, vectors):
+                if vector is None:
+                    self._count("embed_failed")
+                    with self._stats_lock:
+                        source = payload.get("source_file")
+                        self.failed_sources[source] = self.failed_sources.get(source, 0) + 1
+                    continue
+                try:
+                    point = models.PointStruct(id=point_id, vector=vector, payload=payload)
+                    if self.checkpoint is not None:
+                        self.checkpoint.spool(point)
+                    upsert_queue.put(point)
+                except Exception as e:
+                    # A lost point would otherwise let its file count as fully indexed
+                    self._fail(e, f"Could not queue a point for {payload.get('source_file', '?')}")
+                    break
+                self._count("embedded")
+
+    def _upsert_loop(self, upsert_queue):
+        in_flight = threading.BoundedSemaphore(self.upsert_concurrency)
+        with ThreadPoolExecutor(max_workers=self.upsert_concurrency, thread_name_prefix="upsert") as pool:
+            def submit(batch):
+                in_flight.acquire()
+                future = pool.submit(self._upsert_batch, batch)
+                future.add_done_callback(lambda _: in_flight.release())
+
+            batch = []
+            while True:
+                item = upsert_queue.get()
+                if item is _DONE: break
+                # After a fatal failure keep draining so the embedders never block on a full queue
+                if self._failed.is_set(): continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    submit(batch)
+                    batch = []
+            if batch and not self._failed.is_set():
+                submit(batch)
+
+    def _upsert_batch(self, batch):
+        for attempt in range(UPSERT_RETRIES):
+            try:
+                self.qdrant.upsert(collection_name=self.collection_name, points=batch, wait=True)
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_indexed([point.id for point in batch])
+                self._count("upserted", len(batch))
+                self._count("batches")
+                print(f"-> Indexed {self.stats['upserted']} chunks ({self.stats['embedded']} embedded so far).")
+                return
+            except Exception as e:
+                if attempt == UPSERT_RETRIES - 1:
+                    self._fail(e, f"Indexing failed for a batch of {len(batch)} points")
+                    return
+                time.sleep(2 ** attempt)
@@ -0,0 +1,143 @@
+import os
+import json
+import numpy as np
+from dotenv import load_dotenv
+from rag_config import COLLECTION_NAME
+
+# --- Local Index Config ---
+LOCAL_INDEX_PATH = os.environ.get("LOCAL_INDEX_PATH", f"./.cache/{COLLECTION_NAME}.npz")
+# Exact brute-force search up to this many points; an IVF (clustered) index above it
+BRUTE_FORCE_MAX = 20000
+IVF_PROBES = 8
+
+
+class LocalHit:
+    """Mirrors the fields of a Qdrant ScoredPoint that the agent reads."""
+
+    __slots__ = ("id", "score", "payload", "vector")
+
+    def __init__(self, id, score, payload, vector=None):
+        self.id = id
+        self.score = score
+        self.payload = payload
+        self.vector = vector
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    """In-process cosine index over a snapshot of resume_knowledge_base.
+
+    Small collections are searched exactly with one matrix product. Large ones get an
+    inverted-file index: points are bucketed by nearest k-means centroid and a query only
+    scans the IVF_PROBES closest buckets.
+    """
+
+    def __init__(self, ids, vectors, payloads, brute_force_max=BRUTE_FORCE_MAX, probes=IVF_PROBES):
+        self.ids = list(ids)
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        self.payloads = list(payloads)
+        self.roles = np.array([p.get("role", "") for p in self.payloads], dtype=object)
+        self.probes = probes
+        self.centroids = None
+        self.buckets = None
+        if len(self.ids) > brute_force_max:
+            self._build_ivf()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build_ivf(self, iterations=10, seed=0):
+        rng = np.random.default_rng(seed)
+        n = len(self.ids)
+        n_lists = int(np.sqrt(n))
+        # Train centroids on a sample; spherical k-means since vectors are unit length
+        sample = self.vectors[rng.choice(n, size=min(n, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assign == c]
+                if len(members): centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 8192):
+            assign[start:start + 8192] = np.argmax(self.vectors[start:start + 8192] @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.buckets = [np.flatnonzero(assign == c) for c in range(n_lists)]
+
+    def search(self, query_vector, limit=5, role=None, with_vectors=False):
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if self.centroids is None:
+            candidates = np.arange(len(self.ids))
+        else:
+            nearest = np.argsort(-(self.centroids @ query))[:self.probes]
+            candidates = np.concatenate([self.buckets[c] for c in nearest])
+        if role is not None:
+            candidates = candidates[self.roles[candidates] == role]
+        if not len(candidates):
+            return []
+
+        scores = self.vectors[candidates] @ query
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        return [
+            LocalHit(self.ids[candidates[i]], float(scores[i]), self.payloads[candidates[i]],
+                     self.vectors[candidates[i]].tolist() if with_vectors else None)
+            for i in top
+        ]
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        np.savez_compressed(
+            path,
+            ids=np.array([str(i) for i in self.ids]),
+            vectors=self.vectors,
+            payloads=np.array(json.dumps(self.payloads))
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        return cls(data["ids"].tolist(), data["vectors"], json.loads(str(data["payloads"])))
+
+
+def export_snapshot(qdrant_client, collection_name, path=LOCAL_INDEX_PATH, page_size=1000):
+    """Scrolls a whole Qdrant collection (payloads + vectors) into a local .npz snapshot."""
+    ids, vectors, payloads = [], [], []
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        for point in points:
+            ids.append(str(point.id))
+            vectors.append(point.vector)
+            payloads.append(point.payload or {})
+        if offset is None:
+            break
+    index = LocalVectorIndex(ids, vectors, payloads)
+    index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    from qdrant_client import QdrantClient
+
+    load_dotenv()
+    qdrant = QdrantClient(url=os.environ.get("QDRANT_HOST", "localhost"), api_key=os.environ.get("QDRANT_API_KEY", ""))
+    index = export_snapshot(qdrant, COLLECTION_NAME)
+    print(f"Saved {len(index)} points to {LOCAL_INDEX_PATH}")
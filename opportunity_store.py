@@ -0,0 +1,251 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+
+# --- Opportunity Store Config ---
+OPPORTUNITY_DB_PATH = os.environ.get("OPPORTUNITY_DB_PATH", "./.cache/opportunities.sqlite")
+# A careers URL is offered to the strategy prompt once this many strategies found it independently
+# (a strategy repeating a URL it was offered does not count)
+OPPORTUNITY_MIN_TIMES_SEEN = int(os.environ.get("OPPORTUNITY_MIN_TIMES_SEEN", "2"))
+# Known careers pages handed to the strategy prompt
+OPPORTUNITY_PROMPT_URLS = int(os.environ.get("OPPORTUNITY_PROMPT_URLS", "30"))
+
+# Table header (lowercased) -> row field; covers both strategy tables and close variants
+COLUMN_FIELDS = {
+    "company": "company", "company name": "company",
+    "role": "role", "job title": "role", "position": "role",
+    "location": "location", "country/region": "location", "country": "location",
+    "visa path": "visa_path", "visa type": "visa_path", "visa": "visa_path",
+    "match reason": "match_reason",
+    "application link": "url", "link": "url", "url": "url", "careers page": "url",
+}
+ROW_FIELDS = ("section", "company", "role", "location", "visa_path", "match_reason", "url")
+
+_LINK = re.compile(r"\[[^\]]*\]\((https?://[^)\s]+)\)")
+_BARE_URL = re.compile(r"https?://[^\s|)\]]+")
+
+
+def normalize_company(name):
+    return " ".join(re.sub(r"[^a-z0-9&+ ]", " ", (name or "").lower()).split())
+
+
+def normalize_url(url):
+    url = (url or "").strip().rstrip("/.,")
+    match = re.match(r"(https?://)([^/]+)(.*)", url, re.IGNORECASE)
+    return (match.group(1).lower() + match.group(2).lower() + match.group(3)) if match else ""
+
+
+def _cell_url(cell):
+    match = _LINK.search(cell)
+    if match: return normalize_url(match.group(1))
+    match = _BARE_URL.search(cell)
+    return normalize_url(match.group(0)) if match else ""
+
+
+def _cell_text(cell):
+    return re.sub(r"[*_`]", "", cell).strip()
+
+
+class OpportunityParser:
+    """Incremental parser for the markdown opportunity tables in a strategy.
+
+    feed() takes text deltas as they stream in and returns the rows completed so far; close()
+    flushes the last line. Rows are dicts with ROW_FIELDS; `section` comes from the closest
+    preceding heading ("domestic" / "international").
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._section = None
+        self._columns = None
+
+    def feed(self, delta):
+        self._buffer += delta or ""
+        *lines, self._buffer = self._buffer.split("\n")
+        return [row for row in map(self._parse_line, lines) if row]
+
+    def close(self):
+        line, self._buffer = self._buffer, ""
+        row = self._parse_line(line)
+        return [row] if row else []
+
+    def _parse_line(self, line):
+        line = line.strip()
+        if line.startswith("#"):
+            heading = line.lower()
+            self._section = "domestic" if "domestic" in heading else "international" if "international" in heading else None
+            self._columns = None
+            return None
+        if not line.startswith("|"):
+            # Any non-table line ends the current table
+            if line: self._columns = None
+            return None
+
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        if all(re.fullmatch(r":?-{3,}:?", cell) for cell in cells if cell):
+            return None
+        if self._columns is None:
+            self._columns = [COLUMN_FIELDS.get(_cell_text(cell).lower()) for cell in cells]
+            return None
+
+        row = dict.fromkeys(ROW_FIELDS, "")
+        row["section"] = self._section or ""
+        for field, cell in zip(self._columns, cells):
+            if field == "url":
+                row["url"] = _cell_url(cell)
+            elif field:
+                row[field] = _cell_text(cell)
+        # Skip template rows such as "| Company Name | Job Title | ... |"
+        if not row["company"] or normalize_company(row["company"]) in ("company name", "company"):
+            return None
+        return row
+
+
+def parse_opportunities(markdown_text):
+    parser = OpportunityParser()
+    return parser.feed(markdown_text) + parser.close()
+
+
+class OpportunityStore:
+    """SQLite table of opportunities parsed from generated strategies.
+
+    Rows are deduplicated by (normalized company, normalized URL); seeing a row again bumps
+    last_seen / times_seen and updates role, location and visa path when the new row has them.
+    A row that only repeats a URL the prompt offered bumps last_seen but not times_seen.
+    Pass path=":memory:" for a throwaway store.
+    """
+
+    def __init__(self, path=OPPORTUNITY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = self._init_db(path)
+
+    def _init_db(self, path):
+        try:
+            folder = os.path.dirname(path) if path != ":memory:" else ""
+            if folder: os.makedirs(folder, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS opportunities ("
+                "company_key TEXT NOT NULL, url TEXT NOT NULL, company TEXT NOT NULL, "
+                "section TEXT, role TEXT, location TEXT, visa_path TEXT, match_reason TEXT, role_filter TEXT, "
+                "first_seen REAL NOT NULL, last_seen REAL NOT NULL, times_seen INTEGER NOT NULL DEFAULT 1, "
+                "PRIMARY KEY (company_key, url))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_opportunities_section ON opportunities (section, role_filter)")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_opportunities_last_seen ON opportunities (last_seen)")
+            db.commit()
+            return db
+        except Exception as e:
+            print(f"Opportunity Store Warning: disabled ({e})")
+            return None
+
+    def add_many(self, rows, role_filter="All", offered=(), grounded=()):
+        """Upserts parsed rows; returns how many were written.
+
+        offered ([(company, url)]) are the known careers pages the prompt included; a row repeating
+        one of them is not counted as another sighting unless its URL is among the grounded URLs
+        (the search results the answer cited).
+        """
+        now = time.time()
+        offered = {(normalize_company(company), normalize_url(url)) for company, url in offered}
+        grounded = {normalize_url(url) for url in grounded}
+        records = []
+        for row in rows:
+            company_key, url = normalize_company(row.get("company")), row.get("url", "")
+            if not company_key: continue
+            echoed = (company_key, url) in offered and url not in grounded
+            records.append((company_key, url, row["company"], row.get("section", ""), row.get("role", ""),
+                            row.get("location", ""), row.get("visa_path", ""), row.get("match_reason", ""),
+                            role_filter, now, now, 0 if echoed else 1))
+        if not records or self._db is None: return 0
+        with self._lock:
+            try:
+                self._db.executemany(
+                    "INSERT INTO opportunities (company_key, url, company, section, role, location, visa_path, "
+                    "match_reason, role_filter, first_seen, last_seen, times_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (company_key, url) DO UPDATE SET "
+                    "last_seen = excluded.last_seen, times_seen = times_seen + excluded.times_seen, "
+                    "role = COALESCE(NULLIF(excluded.role, ''), role), "
+                    "location = COALESCE(NULLIF(excluded.location, ''), location), "
+                    "visa_path = COALESCE(NULLIF(excluded.visa_path, ''), visa_path)",
+                    records
+                )
+                self._db.commit()
+            except Exception as e:
+                print(f"Opportunity Store Warning: write failed ({e})")
+                return 0
+        return len(records)
+
+    def find(self, company=None, section=None, role_filter=None, limit=100):
+        """Most recently seen opportunities, optionally filtered."""
+        if self._db is None: return []
+        clauses, params = [], []
+        if company:
+            clauses.append("company_key = ?")
+            params.append(normalize_company(company))
+        if section:
+            clauses.append("section = ?")
+            params.append(section)
+        if role_filter:
+            clauses.append("role_filter = ?")
+            params.append(role_filter)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        columns = ["company", "section", "role", "location", "visa_path", "match_reason", "url", "role_filter", "times_seen", "last_seen"]
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(columns)} FROM opportunities {where} ORDER BY last_seen DESC LIMIT ?",
+                [*params, limit]
+            ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def careers_url(self, company):
+        """The URL seen most often for a company, or None."""
+        if self._db is None: return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url FROM opportunities WHERE company_key = ? AND url != '' "
+                "ORDER BY times_seen DESC, last_seen DESC LIMIT 1",
+                [normalize_company(company)]
+            ).fetchone()
+        return row[0] if row else None
+
+    def known_careers_urls(self, role_filter=None, min_times_seen=OPPORTUNITY_MIN_TIMES_SEEN,
+                           limit=OPPORTUNITY_PROMPT_URLS):
+        """[(company, url)] seen in at least min_times_seen strategies, one per company, most corroborated first."""
+        if self._db is None: return []
+        params = [min_times_seen]
+        role_clause = ""
+        if role_filter:
+            role_clause = "AND role_filter = ? "
+            params.append(role_filter)
+        with self._lock:
+            # SQLite takes the bare company/url columns from the row holding MAX(times_seen)
+            rows = self._db.execute(
+                "SELECT company, url, MAX(times_seen) AS seen FROM opportunities "
+                f"WHERE url != '' AND times_seen >= ? {role_clause}"
+                "GROUP BY company_key ORDER BY seen DESC, MAX(last_seen) DESC LIMIT ?",
+                [*params, limit]
+            ).fetchall()
+        return [(company, url) for company, url, _ in rows]
+
+    def count(self):
+        if self._db is None: return 0
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM opportunities").fetchone()[0]
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+def get_default_opportunity_store():
+    """Process-wide store shared by every agent instance."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = OpportunityStore()
+        return _default_store
@@ -3,7 +3,8 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from supabase import create_client
-from groq import Groq
+from text_extraction import extract_upload_text
+from app_clients import get_groq
 import os
 import json
 import re
@@ -133,37 +134,16 @@ def init_supabase():
     if not url or not key: return None
     return create_client(url, key)
 
-@st.cache_resource
-def init_groq():
-    def get_secret(key):
-        if key in os.environ: return os.environ[key]
-        try: return st.secrets[key]
-        except: return None
-    key = get_secret("GROQ_API_KEY")
-    if key: return Groq(api_key=key)
-    return None
-
 try:
     supabase = init_supabase()
-    groq_client = init_groq()
+    # Shared with Main_Page and the other pages (app_clients)
+    groq_client = get_groq()
 except:
     supabase = None
     groq_client = None
 
 # --- Helper Functions ---
 
-def extract_text_from_file(file):
-    """Extract text from uploaded file"""
-    if file is None: return ""
-    try:
-        if file.type == "application/pdf":
-            import pypdf
-            reader = pypdf.PdfReader(file)
-            return "".join([p.extract_text() for p in reader.pages])
-        return file.read().decode("utf-8")
-    except:
-        return ""
-
 def analyze_cv_sections(cv_text):
     """Identify and score different CV sections"""
     sections = {
@@ -465,7 +445,7 @@ def feedback_loop_page():
     
     cv_text = ""
     if cv_file:
-        cv_text = extract_text_from_file(cv_file)
+        cv_text = extract_upload_text(cv_file)
     
     if not cv_text or not jd_text:
         st.info("👆 Upload your CV and paste the job description to get detailed feedback")
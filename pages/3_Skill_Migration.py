@@ -5,8 +5,8 @@ import plotly.graph_objects as go
 from supabase import create_client
 import os
 import json
-import pypdf
-from groq import Groq
+from text_extraction import extract_upload_text
+from app_clients import get_groq, get_agent
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Skill Migration - Job-Search-Agent", page_icon="📈", layout="wide")
@@ -129,24 +129,12 @@ try:
 except Exception as e:
     supabase = None
 
-# Initialize Groq
+# Groq and the agent are shared process-wide (app_clients), also when this page is opened first
 if 'groq' not in st.session_state:
-    groq_key = get_secret("GROQ_API_KEY")
-    if groq_key:
-        st.session_state.groq = Groq(api_key=groq_key)
-    else:
-        st.session_state.groq = None
+    st.session_state.groq = get_groq()
+if 'agent' not in st.session_state:
+    st.session_state.agent = get_agent()
 
-# --- Helper Functions ---
-def extract_text(file):
-    """Extracts text from uploaded PDF or TXT files"""
-    try:
-        if file is None: return ""
-        if file.type == "application/pdf":
-            reader = pypdf.PdfReader(file)
-            return "".join([p.extract_text() for p in reader.pages])
-        return file.read().decode("utf-8")
-    except: return ""
 # --- Industry Detection with Career Paths ---
 def detect_industry_and_paths(report, cv_text=""):
     """Detect the industry from the CV and return industry-specific career paths"""
@@ -808,7 +796,7 @@ def skill_migration_page():
         analyze_disabled = uploaded_cv is None
         if st.button("🚀 Analyze CV", type="primary", use_container_width=True, disabled=analyze_disabled):
             if uploaded_cv:
-                cv_text = extract_text(uploaded_cv)
+                cv_text = extract_upload_text(uploaded_cv)
                 if cv_text:
                     st.session_state.cv_text_for_migration = cv_text
                     
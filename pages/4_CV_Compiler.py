@@ -2,9 +2,9 @@ import streamlit as st
 import pandas as pd
 import re
 import numpy as np
-import pypdf
 from supabase import create_client
-from groq import Groq
+from text_extraction import extract_upload_text
+from app_clients import get_groq
 from fpdf import FPDF
 import os
 
@@ -112,36 +112,16 @@ def init_supabase():
     if not url or not key: return None
     return create_client(url, key)
 
-@st.cache_resource
-def init_groq():
-    def get_secret(key):
-        if key in os.environ: return os.environ[key]
-        try: return st.secrets[key]
-        except: return None
-    key = get_secret("GROQ_API_KEY")
-    if key: return Groq(api_key=key)
-    return None
-
 try:
     supabase = init_supabase()
-    groq_client = init_groq()
+    # Shared with Main_Page and the other pages (app_clients)
+    groq_client = get_groq()
 except:
     supabase = None
     groq_client = None
 
 # --- Helper Functions ---
 
-def extract_text(file):
-    """Extracts text from uploaded PDF or TXT files"""
-    try:
-        if file is None: return ""
-        if file.type == "application/pdf":
-            reader = pypdf.PdfReader(file)
-            return "".join([p.extract_text() for p in reader.pages])
-        return file.read().decode("utf-8")
-    except: 
-        return ""
-
 def create_pdf(text):
     """Safe PDF Generator"""
     try:
@@ -264,7 +244,7 @@ def compiler_page():
     # Extract CV text
     cv_text = ""
     if uploaded_file:
-        cv_text = extract_text(uploaded_file)
+        cv_text = extract_upload_text(uploaded_file)
         st.session_state['compiler_cv_text'] = cv_text
     elif 'compiler_cv_text' in st.session_state:
         cv_text = st.session_state['compiler_cv_text']
@@ -0,0 +1,61 @@
+from context_selection import estimate_tokens
+
+# --- Prompt Budget Defaults ---
+# Tokens allowed for the variable part of a strategy prompt (retrieved context + CV)
+PROMPT_TOKEN_BUDGET = 6000
+# Context is trimmed first, but never below this while the CV is still over budget
+MIN_CONTEXT_TOKENS = 300
+CHARS_PER_TOKEN = 4
+
+
+class PromptBudget:
+    """Fits the retrieved context and the CV into a shared token budget.
+
+    Context arrives as a list of entries, one per retrieved hit in rank order. It is trimmed
+    first, dropping whole entries from the end (the lowest-ranked hits); the CV is only cut
+    once context is down to min_context_tokens.
+    """
+
+    def __init__(self, max_tokens=PROMPT_TOKEN_BUDGET, min_context_tokens=MIN_CONTEXT_TOKENS):
+        self.max_tokens = max_tokens
+        self.min_context_tokens = min_context_tokens
+
+    def fit(self, cv_text, context_entries):
+        """Returns (cv_text, context_text, report) with report holding token counts before and after.
+
+        context_entries are joined with newlines into context_text; a plain string counts as one entry.
+        """
+        cv_text = cv_text or ""
+        if isinstance(context_entries, str):
+            context_entries = [context_entries]
+        entries = [entry for entry in context_entries or [] if entry]
+        context_text = "\n".join(entries)
+        report = {"cv_tokens_in": estimate_tokens(cv_text), "context_tokens_in": estimate_tokens(context_text)}
+
+        overflow = report["cv_tokens_in"] + report["context_tokens_in"] - self.max_tokens
+        if overflow > 0:
+            target = max(report["context_tokens_in"] - overflow, self.min_context_tokens)
+            context_text = "\n".join(_trim_entries(entries, target))
+
+        context_tokens = estimate_tokens(context_text)
+        if estimate_tokens(cv_text) + context_tokens > self.max_tokens:
+            cv_text = cv_text[:max(0, self.max_tokens - context_tokens) * CHARS_PER_TOKEN]
+
+        report["cv_tokens"] = estimate_tokens(cv_text)
+        report["context_tokens"] = estimate_tokens(context_text)
+        report["trimmed"] = report["cv_tokens"] < report["cv_tokens_in"] or report["context_tokens"] < report["context_tokens_in"]
+        return cv_text, context_text, report
+
+
+def _trim_entries(entries, max_tokens):
+    kept, tokens = [], 0
+    for entry in entries:
+        cost = estimate_tokens(entry) + 1
+        if tokens + cost > max_tokens:
+            break
+        kept.append(entry)
+        tokens += cost
+    # An oversized top hit still contributes its head rather than nothing
+    if not kept and entries:
+        return [entries[0][:max_tokens * CHARS_PER_TOKEN]]
+    return kept
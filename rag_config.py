@@ -0,0 +1,100 @@
+import os
+from dotenv import load_dotenv
+
+# Read .env before the module-level settings below, since scripts import this first
+load_dotenv()
+
+# --- Settings shared by ingestion (setup_rag.py, ingest_bulk.py) and the agent ---
+
+# --- Embeddings ---
+# Overridable so a local stand-in server can replace the Gemini API
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+# batchEmbedContents accepts at most 100 requests per call
+MAX_EMBED_BATCH = 100
+EMBEDDING_MODEL = "text-embedding-004"
+FULL_EMBEDDING_DIM = 768
+# text-embedding-004 can return shorter vectors via outputDimensionality (e.g. 256 or 384).
+# Ingestion and query embedding both read this one setting.
+EMBEDDING_DIM = int(os.environ.get("EMBEDDING_DIM", str(FULL_EMBEDDING_DIM)))
+BASE_COLLECTION_NAME = "resume_knowledge_base"
+
+
+def collection_name_for(dim=EMBEDDING_DIM):
+    """Each dimensionality gets its own collection, so query and index vectors cannot drift apart."""
+    return BASE_COLLECTION_NAME if dim == FULL_EMBEDDING_DIM else f"{BASE_COLLECTION_NAME}_d{dim}"
+
+
+def embedding_cache_model(model=EMBEDDING_MODEL, dim=EMBEDDING_DIM):
+    # Full-size vectors keep the plain model name so existing cache entries stay valid
+    return model if dim == FULL_EMBEDDING_DIM else f"{model}@{dim}"
+
+
+def embedding_request(text, model=EMBEDDING_MODEL, dim=EMBEDDING_DIM):
+    """One embedContent / batchEmbedContents request body."""
+    request = {"model": f"models/{model}", "content": {"parts": [{"text": text}]}}
+    if dim != FULL_EMBEDDING_DIM:
+        request["outputDimensionality"] = dim
+    return request
+
+
+COLLECTION_NAME = collection_name_for(EMBEDDING_DIM)
+
+# The agent only ever shows the first SNIPPET_CHARS of a hit, so ingestion stores that
+# prefix as its own payload field and searches fetch it instead of the full text.
+SNIPPET_CHARS = 600
+SEARCH_PAYLOAD_FIELDS = ["role", "snippet", "source_file", "person_id"]
+
+
+def make_snippet(text):
+    return (text or "")[:SNIPPET_CHARS]
+
+# Keyword payload indexes let Qdrant plan filtered HNSW searches (role filter) and
+# source_file lookups without scanning payloads as the collection grows.
+PAYLOAD_INDEXES = ["role", "source_file"]
+
+
+def ensure_payload_indexes(qdrant_client, collection_name):
+    from qdrant_client import models
+
+    for field_name in PAYLOAD_INDEXES:
+        qdrant_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+            wait=True
+        )
+
+
+# --- Quantization ---
+# "none", "scalar" (int8, ~4x less vector RAM) or "binary" (1 bit/dim, ~32x less; best at high dims).
+# Quantized vectors stay in RAM and the float32 originals move to disk for rescoring.
+QUANTIZATION = os.environ.get("QDRANT_QUANTIZATION", "none")
+QUANTIZATION_OVERSAMPLING = float(os.environ.get("QDRANT_OVERSAMPLING", "2.0"))
+QUANTIZATION_KINDS = ("none", "scalar", "binary")
+
+
+def quantization_config(kind=QUANTIZATION):
+    from qdrant_client import models
+
+    if kind == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=True))
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    if kind not in (None, "none"):
+        raise ValueError(f"Unknown quantization '{kind}', expected one of {QUANTIZATION_KINDS}")
+    return None
+
+
+def vectors_config(size, kind=QUANTIZATION):
+    from qdrant_client import models
+
+    return models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=kind not in (None, "none"))
+
+
+def quantization_search_params(oversampling=QUANTIZATION_OVERSAMPLING, rescore=True):
+    """Search params for a quantized collection: fetch oversampling * k by quantized score, then rescore in float32."""
+    from qdrant_client import models
+
+    return models.SearchParams(quantization=models.QuantizationSearchParams(
+        ignore=False, rescore=rescore, oversampling=oversampling))
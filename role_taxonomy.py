@@ -0,0 +1,115 @@
+import os
+import re
+from collections import defaultdict
+from dotenv import load_dotenv
+
+# --- Role Taxonomy ---
+# These are the values the dashboard's "Target Role" filter matches against the `role` payload field.
+ROLE_CATEGORIES = ["Data Science", "Sales", "Engineering"]
+OTHER_ROLE = "Other"
+
+ROLE_KEYWORDS = {
+    "Data Science": [
+        "data scientist", "data science", "data analyst", "machine learning", "deep learning", "statistics",
+        "statistical", "analytics", "business intelligence", "pandas", "tensorflow", "pytorch", "scikit",
+        "nlp", "tableau", "power bi", "data mining", "predictive model", "econometrics", "r programming"
+    ],
+    "Sales": [
+        "sales", "account executive", "account manager", "business development", "customer success",
+        "pre-sales", "presales", "quota", "crm", "salesforce", "lead generation", "cold calling", "negotiation",
+        "territory", "retail", "merchandising", "revenue growth", "key account", "channel partner"
+    ],
+    "Engineering": [
+        "software engineer", "developer", "engineering", "engineer", "devops", "backend", "frontend",
+        "full stack", "java", "javascript", "c++", "kubernetes", "docker", "microservices", "embedded",
+        "mechanical", "electrical", "civil", "firmware", "cloud architect", "sre"
+    ],
+}
+
+_PATTERNS = {
+    category: [re.compile(r"(?<![a-z])" + re.escape(keyword) + r"(?![a-z])") for keyword in keywords]
+    for category, keywords in ROLE_KEYWORDS.items()
+}
+
+
+def role_scores(text, title_text=""):
+    """Keyword hits per category; title_text matches count three times (see categorize_role)."""
+    text, title_text = (text or "").lower(), (title_text or "").lower()
+    return {
+        category: sum(3 * len(p.findall(title_text)) + len(p.findall(text)) for p in patterns)
+        for category, patterns in _PATTERNS.items()
+    }
+
+
+def _best_role(scores):
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else OTHER_ROLE
+
+
+def categorize_role(text, title_text=""):
+    """Maps free text to one of ROLE_CATEGORIES (or OTHER_ROLE) by keyword hits.
+
+    Matches in title_text (job titles / positions held) count three times as much as
+    matches in the general text, since titles say more about the role than skill lists.
+    """
+    return _best_role(role_scores(text, title_text))
+
+
+def retag_collection(qdrant_client, collection_name, page_size=500):
+    """Rewrites `role` on existing points from their text, without re-embedding anything.
+
+    Like ingestion, every chunk of one resume (source_file, or person_id for bulk rows) gets
+    the category of the whole resume: keyword hits are summed over its chunks, so a first pass
+    collects scores and point IDs and a second pass writes the roles. The old name is kept as
+    `candidate_name` when the old role was not already a category.
+    """
+    from qdrant_client import models
+    from context_selection import source_key
+
+    scores = defaultdict(lambda: dict.fromkeys(ROLE_KEYWORDS, 0))
+    point_ids = defaultdict(list)
+    offset, total = None, 0
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name, limit=page_size, offset=offset,
+            with_payload=["text", "role", "source_file", "person_id"], with_vectors=False
+        )
+        names = []
+        for point in points:
+            payload = point.payload or {}
+            text = payload.get("text", "")
+            experience = text.split("Experience:", 1)[1] if "Experience:" in text else ""
+            key = source_key(payload) or point.id
+            for category, hits in role_scores(text, experience).items():
+                scores[key][category] += hits
+            point_ids[key].append(point.id)
+            old_role = payload.get("role")
+            if old_role and old_role not in ROLE_CATEGORIES and old_role != OTHER_ROLE:
+                names.append(models.SetPayloadOperation(set_payload=models.SetPayload(
+                    payload={"candidate_name": old_role}, points=[point.id])))
+        if names:
+            qdrant_client.batch_update_points(collection_name=collection_name, update_operations=names)
+        total += len(points)
+        print(f"Scored {total} points...")
+        if offset is None:
+            break
+
+    groups = defaultdict(list)
+    for key, ids in point_ids.items():
+        groups[_best_role(scores[key])].extend(ids)
+    for category, ids in groups.items():
+        for start in range(0, len(ids), page_size):
+            qdrant_client.set_payload(collection_name=collection_name, payload={"role": category},
+                                      points=ids[start:start + page_size])
+        print(f"Re-tagged {len(ids)} points as {category}")
+    return total
+
+
+if __name__ == "__main__":
+    from qdrant_client import QdrantClient
+    from rag_config import ensure_payload_indexes, COLLECTION_NAME
+
+    load_dotenv()
+    qdrant = QdrantClient(url=os.environ.get("QDRANT_HOST", "localhost"), api_key=os.environ.get("QDRANT_API_KEY", ""))
+    ensure_payload_indexes(qdrant, COLLECTION_NAME)
+    retag_collection(qdrant, COLLECTION_NAME)
@@ -1,28 +1,32 @@
 import os
 import glob
-import requests
-import json
+import argparse
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient, models
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from docx import Document
-import pypdf
-import time
-import uuid
+from rag_config import (
+    make_snippet, ensure_payload_indexes, quantization_config, vectors_config, QUANTIZATION, QUANTIZATION_KINDS,
+    EMBEDDING_DIM, COLLECTION_NAME, embedding_cache_model
+)
+from role_taxonomy import categorize_role
+from batch_embedder import BatchEmbedder
+from ingest_pipeline import IngestPipeline, INGEST_EMBED_WORKERS, INGEST_UPSERT_CONCURRENCY
+from ingest_checkpoint import IngestCheckpoint, checkpoint_path
+from index_manifest import IndexManifest, file_sha256, chunk_point_id, INDEX_MANIFEST_PATH
+from text_cache import get_default_text_cache
+from text_extraction import extract_files, EXTRACT_WORKERS, EXTRACT_TIMEOUT, SUPPORTED_EXTENSIONS
 
 # --- Setup and Configuration ---
 load_dotenv()
 
 # --- Gemini API Config ---
 API_KEY = os.environ.get("GEMINI_API_KEY", "")
-EMBEDDING_MODEL = "text-embedding-004"
-EMBEDDING_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{EMBEDDING_MODEL}:embedContent?key={API_KEY}"
+# Model, dimensionality and collection name come from rag_config (EMBEDDING_DIM env var)
+CACHE_MODEL = embedding_cache_model()
 
 # --- Qdrant Config ---
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "localhost")
 QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY", "") 
-COLLECTION_NAME = 'resume_knowledge_base'
-EMBEDDING_DIM = 768
 BATCH_SIZE = 500 # NEW: Define batch size for upsert operations
 
 RESUMES_DIR = './resumes_data'
@@ -33,55 +37,13 @@ if not os.path.exists(RESUMES_DIR):
     print(f"Created directory: {RESUMES_DIR}. Please place your 1000 resumes inside.")
     exit()
 
-# --- Utility Functions (extract_text_... and get_embedding remain the same) ---
-
-def extract_text_from_pdf(filepath):
-    """Uses pypdf to extract text from a PDF file stream."""
-    try:
-        with open(filepath, 'rb') as file:
-            pdf_reader = pypdf.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ""
-            return text
-    except Exception as e:
-        print(f"Error processing PDF {filepath}: {e}")
-        return ""
-
-def extract_text_from_docx(filepath):
-    """Extracts text from a DOCX file."""
-    try:
-        doc = Document(filepath)
-        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
-    except Exception as e:
-        print(f"Error processing DOCX {filepath}: {e}")
-        return ""
-        
-def get_embedding(text):
-    """Calls Gemini API to get a single embedding vector."""
-    if not API_KEY:
-        raise ValueError("API Key is missing for embedding generation.")
-        
-    payload = { "model": EMBEDDING_MODEL, "content": { "parts": [{ "text": text }] } }
-    
-    # Simple retry logic for stability during large dataset processing
-    for attempt in range(3):
-        try:
-            response = requests.post(
-                EMBEDDING_API_URL,
-                headers={'Content-Type': 'application/json'},
-                data=json.dumps(payload)
-            )
-            response.raise_for_status()
-            return response.json()['embedding']['values']
-        except requests.exceptions.RequestException as e:
-            time.sleep(2 ** attempt)
-            continue
-    raise ConnectionError(f"Failed to get embedding after 3 attempts.")
-
+# --- Utility Functions ---
+# extract_text_from_pdf / extract_text_from_docx live in text_extraction.py so pool workers can import them
 
 # --- Main RAG Setup Pipeline ---
-def setup_rag_pipeline():
+def setup_rag_pipeline(quantization=QUANTIZATION, workers=EXTRACT_WORKERS, extract_timeout=EXTRACT_TIMEOUT, ordered=True,
+                       embed_workers=INGEST_EMBED_WORKERS, upsert_concurrency=INGEST_UPSERT_CONCURRENCY, incremental=False,
+                       resume=False):
     print("--- Starting RAG Vector Database Setup (Qdrant) ---")
     
     # 1. Initialize Qdrant Client
@@ -100,88 +62,156 @@ def setup_rag_pipeline():
         print(f"Original error: {e}")
         return
 
-    # Check/Create Collection (Recreates the collection to start fresh)
+    # The manifest records which file contents are already in the collection
+    manifest = IndexManifest.load(INDEX_MANIFEST_PATH, COLLECTION_NAME, CACHE_MODEL)
+
+    # Embedded points are spooled here until indexed; --resume picks up where a failed run stopped
+    checkpoint = IngestCheckpoint(checkpoint_path("setup_rag"), COLLECTION_NAME, CACHE_MODEL, resume=resume)
+
+    # Check/Create Collection (a full run recreates it to start fresh; incremental and resumed runs keep what is there)
     try:
-        qdrant.recreate_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=models.VectorParams(size=EMBEDDING_DIM, distance=models.Distance.COSINE)
-        )
-        print(f"Recreated Qdrant collection: {COLLECTION_NAME}")
+        if (incremental or resume) and qdrant.collection_exists(COLLECTION_NAME):
+            ensure_payload_indexes(qdrant, COLLECTION_NAME)
+            if not incremental:
+                # Resuming a full rebuild: every file is due again, the checkpoint skips what was already indexed
+                manifest.clear()
+            print(f"{'Resuming' if resume else 'Updating'} Qdrant collection: {COLLECTION_NAME} "
+                  f"({len(manifest.files)} files in manifest, {checkpoint.counts()['indexed']} points checkpointed)")
+        else:
+            qdrant.recreate_collection(
+                collection_name=COLLECTION_NAME,
+                vectors_config=vectors_config(EMBEDDING_DIM, quantization),
+                quantization_config=quantization_config(quantization)
+            )
+            ensure_payload_indexes(qdrant, COLLECTION_NAME)
+            # Persist the empty manifest before any point is written, so a failed or interrupted
+            # rebuild never leaves a manifest claiming files the collection no longer holds
+            manifest.clear()
+            manifest.save()
+            print(f"Recreated Qdrant collection: {COLLECTION_NAME} (quantization: {quantization})")
     except Exception as e:
         print(f"Error creating Qdrant collection. Check connection/host: {e}")
         return
 
-    # 2. Document Processing and Chunking 
-    all_chunks = []
+    # 2. Streaming pipeline: extract (process pool) -> chunk -> embed (threads) -> upsert (concurrent batches).
+    # Bounded queues between the stages keep memory flat however many resumes there are.
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=700,
         chunk_overlap=100,
         separators=["\n\n", "\n", " ", ""]
     )
     
-    files = glob.glob(os.path.join(RESUMES_DIR, '*'))
+    files = [f for f in glob.glob(os.path.join(RESUMES_DIR, '*')) if f.lower().endswith(SUPPORTED_EXTENSIONS)]
     if not files:
         print(f"ERROR: No resume files found in {RESUMES_DIR}. Cannot build database.")
         return
 
-    print(f"Found {len(files)} files to process.")
-    
-    # Note: We must re-process the files since the previous run failed before the final success step.
-    for i, filepath in enumerate(files):
-        resume_id = os.path.basename(filepath)
-        if filepath.endswith('.pdf'):
-            raw_text = extract_text_from_pdf(filepath)
-        elif filepath.endswith('.docx'):
-            raw_text = extract_text_from_docx(filepath)
-        else:
-            continue
-        
-        if not raw_text.strip(): continue
-
-        chunks = text_splitter.split_text(raw_text)
-        
-        for j, chunk in enumerate(chunks):
-            try:
-                vector = get_embedding(chunk)
-                all_chunks.append(
-                    models.PointStruct(
-                        id=str(uuid.uuid4()),
-                        vector=vector,
-                        payload={'text': chunk, 'source_file': resume_id}
-                    )
+    # Only new or changed files are extracted and embedded; points of changed and removed files are dropped first.
+    # Points already carrying a file's current hash are kept, so a resumed run does not drop what it indexed.
+    hashes = {os.path.basename(f): file_sha256(f) for f in files}
+    new, changed, removed = manifest.diff(hashes)
+    print(f"Found {len(files)} files: {len(new)} new, {len(changed)} changed, {len(removed)} removed.")
+    stale = changed + removed
+    for start in range(0, len(stale), 500):
+        qdrant.delete(
+            collection_name=COLLECTION_NAME, wait=True,
+            points_selector=models.FilterSelector(filter=models.Filter(should=[
+                models.Filter(
+                    must=[models.FieldCondition(key="source_file", match=models.MatchValue(value=name))],
+                    must_not=[models.FieldCondition(key="file_sha", match=models.MatchValue(value=hashes[name]))]
+                    if name in hashes else []
                 )
-            except Exception as e:
-                print(f"Skipping chunk for {resume_id} due to embedding error: {e}")
-                
-        if (i + 1) % 50 == 0:
-            print(f"Processed {i + 1}/{len(files)} files.")
-
+                for name in stale[start:start + 500]
+            ]))
+        )
+    for name in removed:
+        manifest.remove(name)
 
-    # 3. Upsert (Index) Data to Qdrant (WITH BATCHING FIX)
-    if all_chunks:
-        total_chunks = len(all_chunks)
-        print(f"\nStarting upsert (indexing) for {total_chunks} chunks in batches of {BATCH_SIZE}...")
-        
-        for i in range(0, total_chunks, BATCH_SIZE):
-            batch = all_chunks[i:i + BATCH_SIZE]
-            
-            try:
-                qdrant.upsert(
-                    collection_name=COLLECTION_NAME,
-                    points=batch,
-                    wait=True
-                )
-                print(f"-> Successfully indexed {min(i + BATCH_SIZE, total_chunks)} / {total_chunks} chunks.")
-            except Exception as e:
-                print(f"\n--- FATAL ERROR: Indexing failed for batch starting at index {i}. ---")
-                print(f"Original error: {e}")
-                # We stop the process here if one batch fails due to a deadline issue.
-                return
-            
-        print(f"\n--- SUCCESS! Indexed {total_chunks} total chunks in Qdrant collection: {COLLECTION_NAME}. ---")
+    pending = set(new + changed)
+    files = [f for f in files if os.path.basename(f) in pending]
+    if not files:
+        manifest.save()
+        checkpoint.clear()
+        print(f"\n--- Index is up to date: {COLLECTION_NAME}. ---")
+        return
+    print(f"Processing {len(files)} files ({workers} extraction workers).")
+
+    chunk_counts = {}
+
+    def chunk_stream():
+        extracted = extract_files(files, workers=workers, timeout=extract_timeout, ordered=ordered,
+                                  cache=get_default_text_cache())
+        for i, (filepath, raw_text) in enumerate(extracted):
+            resume_id = os.path.basename(filepath)
+            if (i + 1) % 50 == 0:
+                print(f"Processed {i + 1}/{len(files)} files.")
+            # Empty text (parse error, timeout, crashed worker) stays out of the manifest, so it is retried
+            if not raw_text.strip(): continue
+
+            # Tag every chunk with the resume's overall category so role filters match whole resumes
+            role = categorize_role(raw_text)
+            for j, chunk in enumerate(text_splitter.split_text(raw_text)):
+                chunk_counts[resume_id] = j + 1
+                yield chunk, {'text': chunk, 'snippet': make_snippet(chunk), 'source_file': resume_id, 'role': role,
+                              'file_sha': hashes[resume_id], 'chunk_index': j}
+
+    # 3. Embed and upsert (index) to Qdrant as chunks arrive. Point IDs derive from file name, hash and chunk
+    # index, so re-running over the same content overwrites points instead of duplicating them.
+    embedder = BatchEmbedder(API_KEY, pool_maxsize=embed_workers)
+    pipeline = IngestPipeline(qdrant, COLLECTION_NAME, embedder, batch_size=BATCH_SIZE,
+                              embed_workers=embed_workers, upsert_concurrency=upsert_concurrency,
+                              point_id=lambda text, payload: chunk_point_id(payload['source_file'], payload['file_sha'], payload['chunk_index']),
+                              checkpoint=checkpoint)
+    try:
+        stats = pipeline.run(chunk_stream())
+    except RuntimeError as e:
+        # The manifest is not updated; the checkpoint keeps every embedded point for --resume
+        print(f"\n--- FAILURE: {e} ---")
+        return
+    finally:
+        embedder.close()
+
+    text_stats = get_default_text_cache().stats()
+    print(f"Text cache: {text_stats['hits']} files reused, {text_stats['misses']} extracted "
+          f"({text_stats['bytes'] / 1e6:.1f} MB stored, {text_stats['evictions']} evicted).")
+
+    # Files with chunks that failed to embed are left out too, so the next incremental run retries them
+    for name, count in chunk_counts.items():
+        if name not in pipeline.failed_sources:
+            manifest.set(name, hashes[name], count)
+    manifest.save()
+    checkpoint.clear()
+    if stats["resumed"] or stats["replayed"]:
+        print(f"Resumed: {stats['resumed']} chunks already embedded, {stats['replayed']} spooled points re-sent.")
+
+    if stats["upserted"] or stats["resumed"]:
+        print(f"\n--- SUCCESS! Indexed {stats['upserted']} total chunks in Qdrant collection: {COLLECTION_NAME}. ---")
+        if stats["embed_failed"]:
+            print(f"{stats['embed_failed']} chunks were skipped because embedding failed.")
     else:
         print("\n--- FAILURE: No chunks were successfully embedded and indexed. ---")
 
 
 if __name__ == '__main__':
-    setup_rag_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=f"Build the {COLLECTION_NAME} Qdrant collection ({EMBEDDING_DIM}-dim vectors).")
+    parser.add_argument("--quantization", choices=QUANTIZATION_KINDS, default=QUANTIZATION,
+                        help="Vector quantization for the collection (default: QDRANT_QUANTIZATION or none)")
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS,
+                        help="Processes for text extraction (default: EXTRACT_WORKERS or the CPU count; 1 = no pool)")
+    parser.add_argument("--extract-timeout", type=float, default=EXTRACT_TIMEOUT,
+                        help="Seconds before a single file's extraction is abandoned")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Process files as soon as they are extracted instead of in directory order")
+    parser.add_argument("--embed-workers", type=int, default=INGEST_EMBED_WORKERS,
+                        help="Concurrent embedding requests")
+    parser.add_argument("--upsert-concurrency", type=int, default=INGEST_UPSERT_CONCURRENCY,
+                        help="Upsert batches in flight at once")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep the collection and only index new/changed files, dropping removed ones")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue a failed run from its checkpoint instead of starting over")
+    args = parser.parse_args()
+    setup_rag_pipeline(quantization=args.quantization, workers=args.workers,
+                       extract_timeout=args.extract_timeout, ordered=not args.unordered,
+                       embed_workers=args.embed_workers, upsert_concurrency=args.upsert_concurrency,
+                       incremental=args.incremental, resume=args.resume)
@@ -0,0 +1,174 @@
+import os
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# --- Strategy Cache Config ---
+# Live job openings go stale, so cached strategies expire after a few hours by default
+STRATEGY_CACHE_TTL = int(os.environ.get("STRATEGY_CACHE_TTL", str(6 * 3600)))
+STRATEGY_CACHE_MAX_ITEMS = int(os.environ.get("STRATEGY_CACHE_MAX_ITEMS", "1000"))
+# Semantic reuse: a CV whose embedding is at least this cosine-similar to a cached one
+# (same role filter, still fresh) gets that cached strategy instead of a new generation
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_TTL = int(os.environ.get("SEMANTIC_CACHE_TTL", str(STRATEGY_CACHE_TTL)))
+# Off by default: a reused strategy carries the other candidate's match reasons and skill scores
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "0").lower() in ("1", "true", "yes")
+
+
+def normalize_cv_text(cv_text):
+    # Re-extracting the same PDF can differ in whitespace and case only
+    return " ".join((cv_text or "").split()).lower()
+
+
+def strategy_cache_key(cv_text, role_filter, model_version):
+    cv_hash = hashlib.sha256(normalize_cv_text(cv_text).encode("utf-8")).hexdigest()
+    return f"{model_version}:{role_filter}:{cv_hash}"
+
+
+class InMemoryStrategyCache:
+    """Process-local TTL cache of generate_strategy results (single replica)."""
+
+    def __init__(self, ttl=STRATEGY_CACHE_TTL, max_items=STRATEGY_CACHE_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None: return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._items[key] = (time.time() + (ttl or self.ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+class SupabaseStrategyCache:
+    """Shared TTL cache stored in a Supabase table, so every replica sees the same entries.
+
+    Expects a table `strategy_cache(cache_key text primary key, result_json jsonb, expires_at timestamptz)`.
+    """
+
+    def __init__(self, supabase_client, table="strategy_cache", ttl=STRATEGY_CACHE_TTL):
+        self.client = supabase_client
+        self.table = table
+        self.ttl = ttl
+
+    def get(self, key):
+        try:
+            now = datetime.now(timezone.utc).isoformat()
+            res = self.client.table(self.table).select("result_json").eq("cache_key", key).gt("expires_at", now).limit(1).execute()
+            if not res.data: return None
+            value = res.data[0]["result_json"]
+            return json.loads(value) if isinstance(value, str) else value
+        except Exception as e:
+            print(f"Strategy Cache Warning: read failed ({e})")
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl or self.ttl)
+            self.client.table(self.table).upsert({
+                "cache_key": key,
+                "result_json": value,
+                "expires_at": expires_at.isoformat()
+            }).execute()
+        except Exception as e:
+            print(f"Strategy Cache Warning: write failed ({e})")
+
+
+class SemanticStrategyCache:
+    """Process-local cache of strategy results keyed by CV embedding.
+
+    Entries live in a namespace (model version + role filter); get() returns the most similar
+    unexpired entry's value if its cosine similarity to the query vector reaches `threshold`.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CACHE_TTL, max_items=STRATEGY_CACHE_MAX_ITEMS):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 3), "items": len(self._items)}
+
+    def get(self, namespace, vector, threshold=None):
+        """Returns (value, similarity) for the best match above the threshold, else (None, best_similarity)."""
+        threshold = self.threshold if threshold is None else threshold
+        query = _unit(vector)
+        now = time.time()
+        with self._lock:
+            for item_id in [i for i, (expires_at, *_) in self._items.items() if expires_at < now]:
+                del self._items[item_id]
+            candidates = [(item_id, item) for item_id, item in self._items.items() if item[1] == namespace]
+            best_id, best_similarity = None, None
+            if candidates:
+                similarities = np.stack([item[2] for _, item in candidates]) @ query
+                best = int(np.argmax(similarities))
+                best_id, best_similarity = candidates[best][0], float(similarities[best])
+
+            if best_id is None or best_similarity < threshold:
+                self.misses += 1
+                return None, best_similarity
+            self.hits += 1
+            self._items.move_to_end(best_id)
+            return self._items[best_id][3], best_similarity
+
+    def set(self, namespace, vector, value, ttl=None):
+        with self._lock:
+            self._items[self._next_id] = (time.time() + (ttl or self.ttl), namespace, _unit(vector), value)
+            self._next_id += 1
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+_default_cache = None
+_default_semantic_cache = None
+_default_lock = threading.Lock()
+
+def get_default_strategy_cache():
+    """Process-wide in-memory cache shared by every agent instance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = InMemoryStrategyCache()
+        return _default_cache
+
+
+def get_default_semantic_cache():
+    """Process-wide semantic cache shared by every agent instance."""
+    global _default_semantic_cache
+    with _default_lock:
+        if _default_semantic_cache is None:
+            _default_semantic_cache = SemanticStrategyCache()
+        return _default_semantic_cache
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+import numpy as np
+from context_selection import mmr_select, source_key
+
+
+def _hit(i, vector, **payload):
+    return SimpleNamespace(id=i, vector=vector, payload={"snippet": f"candidate {i} python sql", **payload})
+
+
+def test_source_key_separates_bulk_rows():
+    assert source_key({"source_file": "kaggle_54k_dataset", "person_id": "7"}) == "kaggle_54k_dataset:7"
+    assert source_key({"source_file": "resume.pdf"}) == "resume.pdf"
+    assert source_key({}) is None
+
+
+def test_single_source_corpus_still_returns_k_hits():
+    # Every bulk-ingested row shares source_file="kaggle_54k_dataset"
+    rng = np.random.default_rng(0)
+    hits = [_hit(i, rng.normal(size=16).tolist(), source_file="kaggle_54k_dataset", person_id=str(i))
+            for i in range(40)]
+    selected = mmr_select(hits, rng.normal(size=16).tolist(), 5, text_of=lambda hit: hit.payload["snippet"])
+    assert len(selected) == 5
+
+
+def test_per_resume_cap_still_applies():
+    rng = np.random.default_rng(1)
+    hits = [_hit(i, rng.normal(size=16).tolist(), source_file="one.pdf") for i in range(10)]
+    hits += [_hit(10 + i, rng.normal(size=16).tolist(), source_file=f"other{i}.pdf") for i in range(2)]
+    selected = mmr_select(hits, rng.normal(size=16).tolist(), 5, text_of=lambda hit: hit.payload["snippet"],
+                          max_per_source=2)
+    assert sum(hit.payload["source_file"] == "one.pdf" for hit in selected) == 2
+    assert len(selected) == 4
@@ -0,0 +1,26 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache, text_hash
+
+
+def test_memory_tier_holds_float32_arrays_and_returns_lists():
+    cache = EmbeddingCache(path=None, max_memory_items=2)
+    cache.put_many("model", ["a", "b", "c"], [[0.5] * 768, [0.25] * 768, None])
+    assert all(isinstance(v, np.ndarray) and v.dtype == np.float32 for v in cache._memory.values())
+    assert sum(v.nbytes for v in cache._memory.values()) == 2 * 768 * 4
+
+    vectors = cache.get_many("model", ["a", "b", "c"])
+    assert vectors[0] == [0.5] * 768 and isinstance(vectors[0], list)
+    assert vectors[2] is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_disk_tier_survives_a_restart_and_refills_the_lru(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    EmbeddingCache(path=path).put("model", "text", [1.0, 2.0, 3.0])
+
+    cache = EmbeddingCache(path=path, max_memory_items=1)
+    assert cache.get("model", "text") == [1.0, 2.0, 3.0]
+    assert cache.get("other-model", "text") is None
+    cache.put("model", "newer", [4.0])
+    assert list(cache._memory) == [("model", text_hash("newer"))]
@@ -0,0 +1,147 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from benchmarks.stand_ins import StandIns, ServiceProfile
+from http_transport import ResilientTransport, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture(scope="module")
+def suite():
+    with StandIns(n_points=1) as stand_ins:
+        yield stand_ins
+
+
+@pytest.fixture
+def stand_ins(suite):
+    # Fresh counters per test; each test installs the profile it needs
+    suite.requests = dict.fromkeys(suite.SERVICES, 0)
+    yield suite
+    suite.profiles["gemini"] = ServiceProfile()
+
+
+def _embed_url(suite):
+    return f"{suite.gemini_url}/models/text-embedding-004:embedContent"
+
+
+EMBED_BODY = {"content": {"parts": [{"text": "python sql"}]}}
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retries_honour_retry_after(stand_ins, status):
+    stand_ins.profiles["gemini"] = ServiceProfile(error_status=status, retry_after=0.2, fail_next=2)
+    transport = ResilientTransport(timeout=5, max_retries=3)
+    started = time.monotonic()
+    resp = transport.post(_embed_url(stand_ins), json=EMBED_BODY)
+    assert resp.status_code == 200
+    assert stand_ins.requests["gemini"] == 3
+    assert time.monotonic() - started >= 0.4
+
+
+def test_retries_give_up_with_last_response(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(error_rate=1.0, retry_after=0.05)
+    transport = ResilientTransport(timeout=5, max_retries=2, failure_threshold=10)
+    resp = transport.post(_embed_url(stand_ins), json=EMBED_BODY)
+    assert resp.status_code == 503
+    assert stand_ins.requests["gemini"] == 3
+
+
+def test_deadline_bounds_the_whole_call(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(latency_ms=2000)
+    transport = ResilientTransport(timeout=5, max_retries=3)
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.RequestException):
+        transport.post(_embed_url(stand_ins), json=EMBED_BODY, timeout=0.3)
+    assert time.monotonic() - started < 1.5
+
+
+def test_deadline_cuts_short_a_long_retry_after(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(error_rate=1.0, retry_after=5)
+    transport = ResilientTransport(timeout=0.5, max_retries=3, failure_threshold=10)
+    started = time.monotonic()
+    resp = transport.post(_embed_url(stand_ins), json=EMBED_BODY)
+    assert resp.status_code == 503
+    assert time.monotonic() - started < 1.0
+
+
+def test_circuit_opens_then_half_open_probe_closes_it(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(error_rate=1.0)
+    transport = ResilientTransport(timeout=5, max_retries=0, failure_threshold=2, reset_after=0.3)
+    url = _embed_url(stand_ins)
+    for _ in range(2):
+        assert transport.post(url, json=EMBED_BODY).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        transport.post(url, json=EMBED_BODY)
+    assert stand_ins.requests["gemini"] == 2  # the open circuit sent nothing
+
+    time.sleep(0.35)
+    stand_ins.profiles["gemini"] = ServiceProfile()
+    assert transport.post(url, json=EMBED_BODY).status_code == 200
+    assert transport.breaker(url).opened_at is None
+
+
+def test_failed_half_open_probe_reopens_the_circuit(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(error_rate=1.0)
+    transport = ResilientTransport(timeout=5, max_retries=0, failure_threshold=2, reset_after=0.3)
+    url = _embed_url(stand_ins)
+    for _ in range(2):
+        transport.post(url, json=EMBED_BODY)
+    time.sleep(0.35)
+    assert transport.post(url, json=EMBED_BODY).status_code == 503  # the probe
+    with pytest.raises(CircuitOpenError):
+        transport.post(url, json=EMBED_BODY)
+    assert stand_ins.requests["gemini"] == 3
+
+
+def test_half_open_circuit_admits_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+    start = threading.Barrier(16)
+
+    def call():
+        start.wait()
+        return breaker.allow()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        admitted = list(pool.map(lambda _: call(), range(16)))
+    assert admitted.count(True) == 1
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_callers_fail_fast_while_the_probe_is_in_flight(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(fail_next=2, slow_next=3, slow_ms=500)
+    transport = ResilientTransport(timeout=5, max_retries=0, failure_threshold=2, reset_after=0.3)
+    url = _embed_url(stand_ins)
+    for _ in range(2):
+        transport.post(url, json=EMBED_BODY)
+    time.sleep(0.35)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        probe = pool.submit(transport.post, url, json=EMBED_BODY)
+        time.sleep(0.1)
+        for _ in range(3):
+            with pytest.raises(CircuitOpenError):
+                transport.post(url, json=EMBED_BODY)
+        assert probe.result().status_code == 200
+    assert transport.post(url, json=EMBED_BODY).status_code == 200
+    assert stand_ins.requests["gemini"] == 4
+
+
+def test_hedged_request_beats_a_slow_primary(stand_ins):
+    stand_ins.profiles["gemini"] = ServiceProfile(slow_next=1, slow_ms=2000)
+    transport = ResilientTransport(timeout=5, max_retries=0, hedge_after=0.1)
+    started = time.monotonic()
+    resp = transport.post(_embed_url(stand_ins), json=EMBED_BODY)
+    assert resp.status_code == 200
+    assert time.monotonic() - started < 1.0
+    assert stand_ins.requests["gemini"] == 2
+
+
+def test_qdrant_stand_in_answers_the_health_check(stand_ins):
+    from qdrant_client import QdrantClient
+    client = QdrantClient(url=stand_ins.qdrant_url, check_compatibility=False)
+    assert client.collection_exists(stand_ins.collection_name)
+    assert not client.collection_exists("missing")
@@ -0,0 +1,234 @@
+import importlib
+import sqlite3
+import numpy as np
+import pytest
+from docx import Document
+from qdrant_client import QdrantClient, models
+import batch_embedder
+import ingest_pipeline
+from batch_embedder import BatchEmbedder
+from benchmarks.stand_ins import StandIns
+from embedding_cache import EmbeddingCache
+from index_manifest import IndexManifest, chunk_point_id
+from ingest_checkpoint import IngestCheckpoint
+from ingest_pipeline import IngestPipeline
+from text_cache import ExtractedTextCache
+
+DIM = 8
+
+
+def fake_embedding(text):
+    rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+    return rng.normal(size=DIM).tolist()
+
+
+def fake_embeddings(texts):
+    return [fake_embedding(text) for text in texts]
+
+
+class FakeEmbedder:
+    def __init__(self, api_key, **kwargs):
+        pass
+
+    def __call__(self, texts):
+        return fake_embeddings(texts)
+
+    def close(self):
+        pass
+
+
+class FakeQdrant:
+    """In-memory Qdrant whose upserts can be switched to fail."""
+
+    def __init__(self):
+        self.client = QdrantClient(":memory:")
+        self.fail_upserts = False
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def recreate_collection(self, collection_name, **kwargs):
+        if self.client.collection_exists(collection_name):
+            self.client.delete_collection(collection_name)
+        self.client.create_collection(collection_name,
+                                      vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE))
+
+    def upsert(self, **kwargs):
+        if self.fail_upserts: raise ConnectionError("qdrant down")
+        return self.client.upsert(**kwargs)
+
+
+def _new_collection(qdrant, name="test"):
+    qdrant.recreate_collection(name)
+    return name
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ingest_pipeline.time, "sleep", lambda seconds: None)
+
+
+# --- IndexManifest ---
+def test_manifest_diff_and_round_trip(tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = IndexManifest(str(path), "test", "model")
+    manifest.set("a.pdf", "sha-a", 2)
+    manifest.set("b.pdf", "sha-b", 1)
+    manifest.save()
+
+    loaded = IndexManifest.load(str(path), "test", "model")
+    assert loaded.files == manifest.files
+    assert loaded.diff({"a.pdf": "sha-a", "b.pdf": "sha-b2", "c.pdf": "sha-c"}) == (["c.pdf"], ["b.pdf"], [])
+    assert loaded.diff({"a.pdf": "sha-a"}) == ([], [], ["b.pdf"])
+    # Vectors from another embedding model are not reusable
+    assert IndexManifest.load(str(path), "test", "other-model").files == {}
+
+
+# --- IngestCheckpoint ---
+def test_checkpoint_spools_until_indexed(tmp_path):
+    path = str(tmp_path / "ckpt.sqlite")
+    checkpoint = IngestCheckpoint(path, "test", "model")
+    point = models.PointStruct(id=chunk_point_id("a.pdf", "sha", 0), vector=[0.5] * DIM, payload={"text": "x"})
+    checkpoint.spool(point)
+    assert checkpoint.is_done(point.id)
+    assert [p.id for p in checkpoint.pending()] == [point.id]
+
+    checkpoint.mark_indexed([point.id])
+    assert checkpoint.pending() == []
+    assert checkpoint.counts() == {"pending": 0, "indexed": 1}
+
+    assert IngestCheckpoint(path, "test", "model", resume=True).is_done(point.id)
+    assert not IngestCheckpoint(path, "test", "other-model", resume=True).is_done(point.id)
+    assert not IngestCheckpoint(path, "test", "model").is_done(point.id)
+
+
+# --- IngestPipeline ---
+def _chunks(n, source="a.pdf"):
+    return [(f"chunk {i} of {source}", {"text": f"chunk {i} of {source}", "source_file": source, "chunk_index": i})
+            for i in range(n)]
+
+
+def _point_id(text, payload):
+    return chunk_point_id(payload["source_file"], "sha", payload["chunk_index"])
+
+
+def test_pipeline_indexes_every_chunk():
+    qdrant = FakeQdrant()
+    name = _new_collection(qdrant)
+    calls = []
+    def embed(texts):
+        calls.append(len(texts))
+        return fake_embeddings(texts)
+
+    stats = IngestPipeline(qdrant, name, embed, batch_size=3, embed_workers=2, embed_batch_size=4,
+                           point_id=_point_id).run(_chunks(10))
+    assert stats["upserted"] == 10
+    assert qdrant.count(name).count == 10
+    assert sum(calls) == 10 and max(calls) <= 4
+
+
+def test_pipeline_reports_embed_failures_per_source():
+    qdrant = FakeQdrant()
+    name = _new_collection(qdrant)
+
+    def embed(texts):
+        if any("c.pdf" in text for text in texts): raise ConnectionError("boom")
+        return [None if "b.pdf" in text else fake_embedding(text) for text in texts]
+
+    pipeline = IngestPipeline(qdrant, name, embed, batch_size=3, embed_workers=1, embed_batch_size=2,
+                              point_id=_point_id)
+    stats = pipeline.run(_chunks(4, "a.pdf") + _chunks(2, "b.pdf") + _chunks(2, "c.pdf"))
+    assert stats["embed_failed"] == 4
+    assert pipeline.failed_sources == {"b.pdf": 2, "c.pdf": 2}
+
+
+def test_pipeline_resumes_from_checkpoint_without_re_embedding(tmp_path):
+    qdrant = FakeQdrant()
+    name = _new_collection(qdrant)
+    path = str(tmp_path / "ckpt.sqlite")
+
+    qdrant.fail_upserts = True
+    with pytest.raises(RuntimeError):
+        IngestPipeline(qdrant, name, fake_embeddings, batch_size=3, embed_workers=1,
+                       checkpoint=IngestCheckpoint(path, name, "model"), point_id=_point_id).run(_chunks(6))
+    assert qdrant.count(name).count == 0
+
+    qdrant.fail_upserts = False
+    embedded = []
+    stats = IngestPipeline(qdrant, name, lambda texts: embedded.extend(texts) or fake_embeddings(texts), batch_size=3,
+                           checkpoint=IngestCheckpoint(path, name, "model", resume=True),
+                           point_id=_point_id).run(_chunks(6))
+    assert qdrant.count(name).count == 6
+    assert stats["replayed"] + len(embedded) == 6
+    assert stats["replayed"] > 0
+
+
+def test_batch_embedder_sends_one_request_per_hundred_uncached_texts(monkeypatch):
+    with StandIns(n_points=1, dim=DIM) as stand_ins:
+        monkeypatch.setattr(batch_embedder, "GEMINI_API_BASE", stand_ins.gemini_url)
+        cache = EmbeddingCache(path=None)
+        texts = [f"chunk {i}" for i in range(150)]
+        embedder = BatchEmbedder("key", dim=DIM, cache=cache)
+        cache.put_many(embedder.cache_model, texts[:30], fake_embeddings(texts[:30]))
+        vectors = embedder(texts)
+        embedder.close()
+    assert all(len(vector) == DIM for vector in vectors)
+    # 120 misses: one full batch of 100 and one of 20
+    assert stand_ins.requests["gemini"] == 2
+    assert np.allclose(cache.get(embedder.cache_model, texts[-1]), vectors[-1])
+
+
+# --- setup_rag.py ---
+@pytest.fixture
+def setup_rag(tmp_path, monkeypatch):
+    """setup_rag.py run from a scratch directory with three small resumes and a fake Qdrant."""
+    monkeypatch.chdir(tmp_path)
+    resumes = tmp_path / "resumes_data"
+    resumes.mkdir()
+    for i in range(3):
+        doc = Document()
+        doc.add_paragraph(f"Resume {i}\nData analyst with SQL and Python. " * 5)
+        doc.save(str(resumes / f"r{i}.docx"))
+
+    module = importlib.import_module("setup_rag")
+    qdrant = FakeQdrant()
+    monkeypatch.setattr(module, "QdrantClient", lambda **kwargs: qdrant)
+    monkeypatch.setattr(module, "BatchEmbedder", FakeEmbedder)
+    monkeypatch.setattr(module, "get_default_text_cache", lambda: ExtractedTextCache(path=None))
+    monkeypatch.setattr(module, "EMBEDDING_DIM", DIM)
+    module.qdrant = qdrant
+    return module
+
+
+def test_failed_rebuild_is_not_mistaken_for_an_indexed_collection(setup_rag):
+    qdrant = setup_rag.qdrant
+    setup_rag.setup_rag_pipeline(workers=1)
+    indexed = qdrant.count(setup_rag.COLLECTION_NAME).count
+    assert indexed > 0
+
+    # A full rebuild wipes the collection and then fails to index anything
+    qdrant.fail_upserts = True
+    setup_rag.setup_rag_pipeline(workers=1)
+    assert qdrant.count(setup_rag.COLLECTION_NAME).count == 0
+
+    # The incremental run must see every file as new again, not "up to date"
+    qdrant.fail_upserts = False
+    setup_rag.setup_rag_pipeline(workers=1, incremental=True)
+    assert qdrant.count(setup_rag.COLLECTION_NAME).count == indexed
+
+
+def test_pipeline_stops_when_the_spool_fails(tmp_path):
+    qdrant = FakeQdrant()
+    name = _new_collection(qdrant)
+
+    class BrokenCheckpoint(IngestCheckpoint):
+        def spool(self, point):
+            raise sqlite3.OperationalError("database or disk is full")
+
+    checkpoint = BrokenCheckpoint(str(tmp_path / "ckpt.sqlite"), name, "model")
+    pipeline = IngestPipeline(qdrant, name, fake_embeddings, batch_size=3, embed_workers=2, queue_size=4,
+                              checkpoint=checkpoint, point_id=_point_id)
+    # Far more chunks than the queues hold: a dead embedder would leave run() blocked
+    with pytest.raises(RuntimeError, match="disk is full"):
+        pipeline.run(_chunks(200))
+    assert qdrant.count(name).count == 0
@@ -0,0 +1,25 @@
+from opportunity_store import OpportunityStore
+
+HILTON = {"company": "Hilton", "url": "https://careers.hilton.com", "section": "domestic"}
+MARRIOTT = {"company": "Marriott", "url": "https://jobs.marriott.com", "section": "domestic"}
+
+
+def test_independent_sightings_make_a_url_known():
+    store = OpportunityStore(":memory:")
+    store.add_many([HILTON])
+    assert store.known_careers_urls() == []
+    store.add_many([HILTON])
+    assert store.known_careers_urls() == [("Hilton", "https://careers.hilton.com")]
+
+
+def test_repeating_an_offered_url_is_not_another_sighting():
+    store = OpportunityStore(":memory:")
+    store.add_many([HILTON, MARRIOTT])
+    store.add_many([HILTON, MARRIOTT])
+    offered = store.known_careers_urls()
+
+    for _ in range(3):
+        store.add_many([HILTON, MARRIOTT], offered=offered, grounded=["https://jobs.marriott.com/"])
+    seen = {row["company"]: row["times_seen"] for row in store.find()}
+    # Hilton was only echoed back; Marriott's URL was cited by the search results each time
+    assert seen == {"Hilton": 2, "Marriott": 5}
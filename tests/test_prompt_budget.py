@@ -0,0 +1,31 @@
+from prompt_budget import PromptBudget
+
+
+def _entry(i):
+    # Snippets keep the resume's own line breaks
+    return f"[Role: Data] candidate {i}\nExperience: SQL, Python\nEducation: BSc"
+
+
+def test_context_is_trimmed_at_hit_boundaries():
+    entries = [_entry(i) for i in range(20)]
+    cv_text = "python " * 400
+    cv, context, report = PromptBudget(max_tokens=900, min_context_tokens=50).fit(cv_text, entries)
+
+    kept = context.split("\n[Role: ")
+    assert 0 < len(kept) < len(entries)
+    # Every kept hit is complete: nothing ends after "candidate N" or mid-way through its lines
+    assert context.endswith("Education: BSc")
+    assert context == "\n".join(entries[:len(kept)])
+    assert cv == cv_text and report["trimmed"]
+
+
+def test_context_within_budget_is_untouched():
+    entries = [_entry(i) for i in range(3)]
+    cv, context, report = PromptBudget(max_tokens=6000).fit("short cv", entries)
+    assert context == "\n".join(entries)
+    assert not report["trimmed"]
+
+
+def test_oversized_top_hit_keeps_its_head():
+    cv, context, report = PromptBudget(max_tokens=200, min_context_tokens=100).fit("x" * 2000, ["y" * 4000])
+    assert context == "y" * 400
@@ -0,0 +1,133 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+# --- Extracted Text Cache Config ---
+TEXT_CACHE_PATH = os.environ.get("TEXT_CACHE_PATH", "./.cache/extracted_text.sqlite")
+# Compressed text kept on disk; least recently used documents are evicted beyond this
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def bytes_sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractedTextCache:
+    """SQLite store of extracted document text keyed by (extractor, sha256(raw bytes)).
+
+    `extractor` names the extraction routine and its version (e.g. "pdf:v1/pypdf-5.1.0"),
+    so changing how text is extracted never serves text from the old routine. Text is stored
+    zlib-compressed; once the stored total exceeds max_bytes the least recently used entries
+    are evicted. Failures only disable the cache, never the extraction.
+    """
+
+    def __init__(self, path=TEXT_CACHE_PATH, max_bytes=TEXT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = self._init_db(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        if self._db is not None:
+            self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+
+    def _init_db(self, path):
+        try:
+            folder = os.path.dirname(path)
+            if folder: os.makedirs(folder, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS texts ("
+                "extractor TEXT NOT NULL, data_sha TEXT NOT NULL, text BLOB NOT NULL, size INTEGER NOT NULL, "
+                "last_used REAL NOT NULL, PRIMARY KEY (extractor, data_sha))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS texts_last_used ON texts (last_used)")
+            db.commit()
+            return db
+        except Exception as e:
+            print(f"Text Cache Warning: disabled ({e})")
+            return None
+
+    def get(self, extractor, data_sha):
+        """Cached text or None."""
+        with self._lock:
+            row = None
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT text FROM texts WHERE extractor = ? AND data_sha = ?",
+                                           (extractor, data_sha)).fetchone()
+                    if row is not None:
+                        self._db.execute("UPDATE texts SET last_used = ? WHERE extractor = ? AND data_sha = ?",
+                                         (time.time(), extractor, data_sha))
+                        self._db.commit()
+                except Exception as e:
+                    print(f"Text Cache Warning: read failed ({e})")
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, extractor, data_sha, text):
+        if self._db is None: return
+        blob = zlib.compress(text.encode("utf-8"))
+        with self._lock:
+            try:
+                previous = self._db.execute("SELECT size FROM texts WHERE extractor = ? AND data_sha = ?",
+                                            (extractor, data_sha)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?)",
+                                 (extractor, data_sha, blob, len(blob), time.time()))
+                self._size += len(blob) - (previous[0] if previous else 0)
+                self._evict()
+                self._db.commit()
+            except Exception as e:
+                print(f"Text Cache Warning: write failed ({e})")
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._size > self.max_bytes:
+            rows = self._db.execute("SELECT extractor, data_sha, size FROM texts ORDER BY last_used LIMIT 100").fetchall()
+            if not rows: break
+            for extractor, data_sha, size in rows:
+                if self._size <= self.max_bytes: break
+                self._db.execute("DELETE FROM texts WHERE extractor = ? AND data_sha = ?", (extractor, data_sha))
+                self._size -= size
+                self.evictions += 1
+
+    def get_or_extract(self, extractor, data, extract_fn):
+        """Text for raw bytes: from the cache, or extract_fn(data) on a miss (empty results are not stored)."""
+        data_sha = bytes_sha256(data)
+        text = self.get(extractor, data_sha)
+        if text is None:
+            text = extract_fn(data)
+            if text: self.put(extractor, data_sha, text)
+        return text
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "evictions": self.evictions, "bytes": self._size}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_default_text_cache():
+    """Process-wide cache instance shared by setup_rag.py and the Streamlit pages."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ExtractedTextCache()
+        return _default_cache
@@ -0,0 +1,181 @@
+import io
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from docx import Document
+import pypdf
+from index_manifest import file_sha256
+from text_cache import get_default_text_cache
+
+# --- Extraction Config ---
+# pypdf is pure Python and CPU-bound, so extraction runs in a process pool sized to the cores
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# Pathological PDFs (huge content streams, broken xref tables) are abandoned after this many seconds
+EXTRACT_TIMEOUT = float(os.environ.get("EXTRACT_TIMEOUT", "60"))
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+# Part of every text cache key: bump it whenever the extractors' output changes
+EXTRACTOR_VERSION = f"1/pypdf-{pypdf.__version__}"
+
+
+class ExtractionTimeout(BaseException):
+    """Raised inside a worker when a file exceeds its time limit.
+
+    Derives from BaseException so the extractors' broad `except Exception` does not swallow it.
+    """
+
+
+def extract_text_from_pdf(filepath):
+    """Uses pypdf to extract text from a PDF file stream."""
+    try:
+        with open(filepath, 'rb') as file:
+            pdf_reader = pypdf.PdfReader(file)
+            # Collect pages and join once; repeated += copies the whole text for every page
+            return "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
+    except Exception as e:
+        print(f"Error processing PDF {filepath}: {e}")
+        return ""
+
+
+def extract_text_from_docx(filepath):
+    """Extracts text from a DOCX file."""
+    try:
+        doc = Document(filepath)
+        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+    except Exception as e:
+        print(f"Error processing DOCX {filepath}: {e}")
+        return ""
+
+
+def extract_text(filepath):
+    """Text of a .pdf or .docx file; "" for anything else or on failure."""
+    if filepath.lower().endswith('.pdf'):
+        return extract_text_from_pdf(filepath)
+    if filepath.lower().endswith('.docx'):
+        return extract_text_from_docx(filepath)
+    return ""
+
+
+def file_extractor(filepath):
+    """Text cache key prefix for a file, e.g. "pdf:1/pypdf-5.1.0"."""
+    return f"{os.path.splitext(filepath)[1].lower().lstrip('.')}:{EXTRACTOR_VERSION}"
+
+
+def _upload_pdf_text(data):
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return "".join([p.extract_text() or "" for p in reader.pages])
+
+
+def extract_upload_text(file):
+    """Text of a Streamlit upload (PDF, otherwise UTF-8 text).
+
+    Re-uploading the same PDF is served from the extracted-text cache. Pages are joined
+    without a separator as the pages always did, hence a cache key separate from setup_rag's.
+    Returns "" for no file or an unreadable one.
+    """
+    if file is None: return ""
+    try:
+        data = file.getvalue()
+        if file.type == "application/pdf":
+            return get_default_text_cache().get_or_extract(f"upload-pdf:{EXTRACTOR_VERSION}", data, _upload_pdf_text)
+        return data.decode("utf-8")
+    except Exception:
+        return ""
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_with_timeout(filepath, timeout):
+    # SIGALRM interrupts pure-Python parsing; where it is unavailable (Windows, non-main
+    # threads) the file simply runs to completion.
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_text(filepath)
+    except ExtractionTimeout:
+        print(f"Extraction timed out after {timeout}s, skipping {filepath}")
+        return ""
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def extract_files(filepaths, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, ordered=True, cache=None):
+    """Extracts text from many files in parallel, yielding (filepath, text) pairs.
+
+    ordered=True yields in input order (a slow file holds back the ones after it);
+    ordered=False yields each file as soon as it is done. Files that fail or time out
+    yield "". workers <= 1 extracts in this process.
+
+    With a text cache (text_cache.ExtractedTextCache), files whose bytes were extracted
+    before skip the pool; unordered runs yield those first.
+    """
+    filepaths = list(filepaths)
+    if cache is None:
+        yield from _extract_uncached(filepaths, workers, timeout, ordered)
+        return
+
+    keys = {filepath: (file_extractor(filepath), file_sha256(filepath)) for filepath in filepaths}
+    cached = {}
+    for filepath in filepaths:
+        text = cache.get(*keys[filepath])
+        if text is not None: cached[filepath] = text
+    extracted = _extract_uncached([f for f in filepaths if f not in cached], workers, timeout, ordered)
+
+    def store(item):
+        filepath, text = item
+        # Failures and timeouts come back as "" and are retried next time
+        if text: cache.put(*keys[filepath], text)
+        return item
+
+    try:
+        if not ordered:
+            yield from cached.items()
+            yield from map(store, extracted)
+            return
+        for filepath in filepaths:
+            yield (filepath, cached[filepath]) if filepath in cached else store(next(extracted))
+    finally:
+        extracted.close()
+
+
+def _extract_uncached(filepaths, workers, timeout, ordered):
+    if workers <= 1 or len(filepaths) <= 1:
+        for filepath in filepaths:
+            yield filepath, _extract_with_timeout(filepath, timeout)
+        return
+
+    # At most 2 x workers files are submitted at once, so extracted text never piles up in
+    # finished futures while the slower embedding stage catches up
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(filepaths)))
+    window = 2 * workers
+    queued = iter(filepaths)
+    in_flight = {}  # future -> filepath, in submission order
+    try:
+        while True:
+            for filepath in queued:
+                in_flight[pool.submit(_extract_with_timeout, filepath, timeout)] = filepath
+                if len(in_flight) >= window: break
+            if not in_flight: return
+
+            if ordered:
+                done = [next(iter(in_flight))]
+            else:
+                done = wait(in_flight, return_when=FIRST_COMPLETED).done
+            for future in done:
+                filepath = in_flight.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    # A crashed worker (e.g. out of memory) loses its file, not the whole run
+                    print(f"Extraction failed for {filepath}: {e}")
+                    text = ""
+                yield filepath, text
+    finally:
+        # An abandoned run (e.g. a failed upsert) only waits for the files already being parsed
+        pool.shutdown(wait=True, cancel_futures=True)